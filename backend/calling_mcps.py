@@ -1,14 +1,76 @@
 import asyncio
 import json
+import os
+import re
 import ollama
+import pydantic
 from fastmcp import Client
 from typing import List, Dict, Any, Optional
+from tools._think import ThinkStreamFilter, strip_think
+from tools._context import CHARS_PER_TOKEN, num_ctx_for
+
+# Keyword classifier used by the plan cache, mirroring the RULES block of the planning prompt
+INTENT_PATTERNS = {
+    "price": re.compile(r"\b(price|quote|trading at|worth)\b", re.IGNORECASE),
+    "news": re.compile(r"\b(news|headlines?|sentiment)\b", re.IGNORECASE),
+    "fundamental": re.compile(r"\b(fundamentals?|p/?e|eps|roe|roa|valuation)\b", re.IGNORECASE),
+    "technical": re.compile(r"\b(technical|support|resistance|triangle)\b", re.IGNORECASE),
+    "indicator": re.compile(r"\b(indicators?|rsi|macd|bollinger|sma|ema)\b", re.IGNORECASE),
+    "sheets": re.compile(r"\b(balance sheet|cash ?flow|income statement|financial sheets?)\b", re.IGNORECASE),
+}
+
+INTENT_TOOLS = {
+    "price": "get_stock_price",
+    "news": "get_stock_news",
+    "fundamental": "get_stock_fundamental_details",
+    "technical": "get_stock_technical_analysis",
+    "indicator": "get_stock_indicator_data",
+    "sheets": "get_stock_financial_sheets",
+}
+
+class ToolCall(pydantic.BaseModel):
+    tool: str
+    params: Dict[str, Any]
+
+class ToolPlan(pydantic.BaseModel):
+    tools: List[ToolCall]
+
+# Tools that can summarize their own payload with an extra LLM call (see mcp_sever._tool_output)
+SUMMARIZING_TOOLS = set(INTENT_TOOLS.values()) | {"get_stock_sector_metrics"}
+
+# Parameters the client sets itself, hidden from the planner
+CLIENT_MANAGED_PARAMS = {"summarize"}
+
+# Upper bound on planner/replay rounds per query, so a planner that keeps asking for tools cannot loop forever
+MAX_PLANNING_STEPS = 8
+
+# Planner only needs to know what each tool returned, not the full payload
+PLANNER_RESULT_PREVIEW_CHARS = 200
+
+# Raw tool payloads run to tens of KB; the terminal log only shows their start
+TOOL_RESULT_PRINT_CHARS = 200
+
+# Context window for streamed answers, sized from the prompt: the final answer carries every raw tool payload
+ANSWER_RESPONSE_TOKENS = 2048
+ANSWER_MIN_CTX = 4096
+ANSWER_MAX_CTX = 32768
+# Room for the answer prompt's fixed text and per-tool headers around the tool results
+ANSWER_PROMPT_OVERHEAD_CHARS = 2000
+
+DEFAULT_PLAN_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "plan_cache.json")
 
 class MCPChatSystem:
-    def __init__(self, mcp_server_path: str, ollama_model: str = "llama3.2"):
+    def __init__(self, mcp_server_path: str, ollama_model: str = "llama3.2", plan_cache_path: str = DEFAULT_PLAN_CACHE_PATH, planner_model: str = "llama3.2:1b"):
         self.mcp_server_path = mcp_server_path
         self.ollama_model = ollama_model
+        # Planning only emits a short JSON object, so a small model is enough; answers use ollama_model
+        self.planner_model = planner_model
         self.conversation_history = []
+        self._ollama = ollama.AsyncClient()
+        self.plan_cache_path = plan_cache_path
+        self._plan_cache: Dict[str, List[Dict[str, Any]]] = self._load_plan_cache()
+        self._response_streamed = False
+        self._planner_system = self._build_planner_system("")
         
     async def start_chat(self):
         """Start the interactive chat session with automatic tool calling"""
@@ -20,6 +82,7 @@ class MCPChatSystem:
             # Get available tools
             tools = await mcp_client.list_tools()
             tool_descriptions = self._format_tools_for_model(tools)
+            self._planner_system = self._build_planner_system(tool_descriptions)
             
             print(f"📋 Loaded {len(tools)} MCP tools")
             print("-" * 60)
@@ -45,12 +108,12 @@ class MCPChatSystem:
                         continue
                     
                     # Process the user input with automatic tool calling
-                    response = await self._process_query_automatically(user_input, mcp_client, tool_descriptions)
-                    if response and '<think>' in response and '</think>' in response:
-                        start = response.find('<think>')
-                        end = response.find('</think>') + len('</think>')
-                        response = response[:start] + response[end:] 
-                    print(f"\n🤖 Assistant: {response}")
+                    self._response_streamed = False
+                    response = await self._process_query_automatically(user_input, mcp_client)
+                    if self._response_streamed:
+                        # Already printed token by token
+                        continue
+                    print(f"\n🤖 Assistant: {strip_think(response)}")
                     
                 except KeyboardInterrupt:
                     print("\n👋 Goodbye!")
@@ -58,15 +121,48 @@ class MCPChatSystem:
                 except Exception as e:
                     print(f"\n❌ Error: {str(e)}")
     
+    def _build_planner_system(self, tool_descriptions: str) -> str:
+        """Build the planner system prompt once per session so Ollama can reuse its KV cache across steps"""
+        return f"""You are a helpful assistant with access to various tools through MCP (Model Context Protocol).
+
+Available tools:
+{tool_descriptions}
+
+You will receive the user's original query, the facts known so far (e.g. the ticker) and a short preview of each tool result.
+
+ANALYZE THE SITUATION:
+- What is the user asking for?
+- What tools have already been executed?
+- What information is still missing to fully answer the user's question?
+
+RULES:
+1. If the user asks about a stock and you don't have a ticker symbol, use get_ticker_from_name first
+2. If you have a ticker symbol from previous results, list ALL remaining tools needed (e.g. get_stock_price and get_stock_news together)
+3. Never repeat a tool that has already been executed
+4. If you have all the information needed, return an empty list
+
+Respond with a JSON object listing ALL tools still needed (or an empty list), in this exact format:
+{{"tools": [{{"tool": "tool_name", "params": {{"param1": "value1"}}}}, ...]}}
+
+Examples:
+- Need ticker first: {{"tools": [{{"tool": "get_ticker_from_name", "params": {{"name": "Apple Inc"}}}}]}}
+- Have ticker, need price: {{"tools": [{{"tool": "get_stock_price", "params": {{"ticker": "AAPL"}}}}]}}
+- Have ticker, need price and news: {{"tools": [{{"tool": "get_stock_price", "params": {{"ticker": "AAPL"}}}}, {{"tool": "get_stock_news", "params": {{"ticker": "AAPL"}}}}]}}
+- All done: {{"tools": []}}"""
+    
     def _format_tools_for_model(self, tools) -> str:
         """Format tools information for the model"""
         tool_info = []
         for tool in tools:
             # Get parameter info
             params = []
-            if hasattr(tool, 'input_schema') and tool.input_schema:
-                properties = tool.input_schema.get('properties', {})
+            # input_schema is the current name (fastmcp 4 / MCP SDK v2); older clients only have inputSchema
+            input_schema = getattr(tool, 'input_schema', None) or getattr(tool, 'inputSchema', None)
+            if input_schema:
+                properties = input_schema.get('properties', {})
                 for param_name, param_info in properties.items():
+                    if param_name in CLIENT_MANAGED_PARAMS:
+                        continue
                     param_type = param_info.get('type', 'string')
                     param_desc = param_info.get('description', '')
                     params.append(f"{param_name} ({param_type}): {param_desc}")
@@ -78,187 +174,330 @@ class MCPChatSystem:
         
         return "\n".join(tool_info)
     
-    async def _process_query_automatically(self, user_query: str, mcp_client, tool_descriptions: str) -> str:
+    def _load_plan_cache(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Seed the plan cache with the single-intent templates and merge any persisted plans"""
+        plan_cache = {
+            intent: [
+                {"tool": "get_ticker_from_name", "params": {"name": "$name"}},
+                {"tool": tool_name, "params": {"ticker": "$ticker"}},
+            ]
+            for intent, tool_name in INTENT_TOOLS.items()
+        }
+        try:
+            with open(self.plan_cache_path) as f:
+                plan_cache.update(json.load(f))
+        except (OSError, ValueError):
+            pass
+        return plan_cache
+    
+    def _save_plan_cache(self):
+        """Persist the plan cache so the next session starts warm"""
+        try:
+            with open(self.plan_cache_path, "w") as f:
+                json.dump(self._plan_cache, f, indent=2)
+        except OSError as e:
+            print(f"⚠️ Could not save plan cache: {str(e)}")
+    
+    def _classify_intent(self, query: str) -> Optional[str]:
+        """Canonicalize the query into an intent key such as 'price' or 'news+price'"""
+        intents = sorted(intent for intent, pattern in INTENT_PATTERNS.items() if pattern.search(query))
+        return "+".join(intents) if intents else None
+    
+    @staticmethod
+    def _failed(tool_result: Dict[str, Any]) -> bool:
+        """Whether a recorded tool call failed; _call_tool stores failures as "Error: ..." (payloads may mention "Error")"""
+        return tool_result['result'].startswith("Error:")
+    
+    def _known_ticker(self, executed_tools: List[Dict[str, Any]]) -> Optional[str]:
+        """Return the ticker symbol resolved by the latest successful get_ticker_from_name call"""
+        for tool in reversed(executed_tools):
+            if tool['tool_name'] != 'get_ticker_from_name' or self._failed(tool):
+                continue
+            try:
+                return json.loads(tool['result']).get('symbol')
+            except (ValueError, TypeError, AttributeError):
+                return None
+        return None
+    
+    def _replay_cached_plan(self, current_query: str, executed_tools: List[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+        """
+        Return the remaining tool requests from the cached plan for this query's intent,
+        or None when the planner LLM has to decide (cache miss, diverged plan, unresolvable params,
+        or the template already ran in full: only the planner can tell whether the query needs more,
+        e.g. a second company in "compare apple and microsoft").
+        """
+        template = self._plan_cache.get(self._classify_intent(current_query) or "")
+        if not template or len(executed_tools) > len(template):
+            return None
+        if [tool['tool_name'] for tool in executed_tools] != [step['tool'] for step in template[:len(executed_tools)]]:
+            return None
+        if any(self._failed(tool) for tool in executed_tools):
+            return None
+        if len(executed_tools) == len(template):
+            return None
+        
+        ticker = self._known_ticker(executed_tools)
+        tool_requests = []
+        for step in template[len(executed_tools):]:
+            params = {}
+            for param_name, value in step['params'].items():
+                if value == "$ticker" and ticker:
+                    params[param_name] = ticker
+                elif isinstance(value, str) and value.startswith("$"):
+                    return None
+                else:
+                    params[param_name] = value
+            tool_requests.append({"tool": step['tool'], "params": params})
+        return tool_requests
+    
+    def _remember_plan(self, current_query: str, executed_tools: List[Dict[str, Any]]):
+        """Store the tool sequence of a successful run as the template for its intent"""
+        intent = self._classify_intent(current_query)
+        if not intent or intent in self._plan_cache or not executed_tools:
+            return
+        if any(self._failed(tool) for tool in executed_tools):
+            return
+        
+        ticker = self._known_ticker(executed_tools)
+        template = []
+        for tool in executed_tools:
+            params = {
+                param_name: "$ticker" if ticker and value == ticker else f"${param_name}"
+                for param_name, value in tool['parameters'].items()
+            }
+            template.append({"tool": tool['tool_name'], "params": params})
+        self._plan_cache[intent] = template
+        self._save_plan_cache()
+    
+    def _partition_tool_requests(self, tool_requests: List[Dict[str, Any]]):
+        """Split planned tools into the batch runnable now and the ones waiting on a ticker lookup"""
+        if not any(t.get('tool') == 'get_ticker_from_name' for t in tool_requests):
+            return tool_requests, []
+        
+        batch, deferred = [], []
+        for tool_request in tool_requests:
+            if 'ticker' in tool_request.get('params', {}):
+                deferred.append(tool_request)
+            else:
+                batch.append(tool_request)
+        return batch, deferred
+    
+    @staticmethod
+    def _call_key(tool_request: Dict[str, Any]) -> tuple:
+        """Hashable identity of a planned call: tool name plus canonical JSON of its params"""
+        return tool_request.get('tool'), json.dumps(tool_request.get('params', {}), sort_keys=True, default=str)
+    
+    async def _call_tool(self, mcp_client, tool_name: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """Call one MCP tool and record its result (or error) in executed-tools form"""
+        try:
+            # Raw tool payloads are synthesized once in _generate_comprehensive_response, never per tool
+            call_parameters = {**parameters, "summarize": False} if tool_name in SUMMARIZING_TOOLS else parameters
+            tool_result = await mcp_client.call_tool(tool_name, call_parameters)
+            # fastmcp returns a CallToolResult; older clients returned the content list itself
+            content = getattr(tool_result, 'content', tool_result)
+            tool_output = content[0].text if content else "No result"
+            print(f"✅ Tool {tool_name} completed with result: {tool_output[:TOOL_RESULT_PRINT_CHARS]}")
+        except Exception as e:
+            print(f"❌ Error with tool {tool_name}: {str(e)}")
+            tool_output = f"Error: {str(e)}"
+        
+        return {
+            'tool_name': tool_name,
+            'parameters': parameters,
+            'result': tool_output
+        }
+    
+    def _update_state(self, state: Dict[str, str], result_id: str, tool_result: Dict[str, Any]):
+        """Record the key facts of a tool result under stable ids, e.g. {"ticker": "AAPL", "r2.get_stock_price": "done"}"""
+        tool_name = tool_result['tool_name']
+        if self._failed(tool_result):
+            state[f"{result_id}.{tool_name}"] = "error"
+            return
+        
+        state[f"{result_id}.{tool_name}"] = "done"
+        if tool_name == 'get_ticker_from_name':
+            ticker = self._known_ticker([tool_result])
+            if ticker:
+                state['ticker'] = ticker
+    
+    async def _plan_step(self, planning_prompt: str) -> str:
+        """Ask the planner model for the next tools; plans with ollama_model instead if the planner model is not pulled"""
+        messages = [
+            {"role": "system", "content": self._planner_system},
+            {"role": "user", "content": planning_prompt}
+        ]
+        try:
+            planning_response = await self._ollama.chat(
+                model=self.planner_model,
+                messages=messages,
+                format=ToolPlan.model_json_schema(),
+                options={"num_predict": 160, "temperature": 0.0}
+            )
+        except ollama.ResponseError as e:
+            if e.status_code != 404 or self.planner_model == self.ollama_model:
+                raise
+            print(f"⚠️ Planner model {self.planner_model} not found (ollama pull {self.planner_model}), planning with {self.ollama_model}")
+            self.planner_model = self.ollama_model
+            return await self._plan_step(planning_prompt)
+        return planning_response['message']['content']
+    
+    async def _process_query_automatically(self, user_query: str, mcp_client) -> str:
         """Automatically process query and use all relevant tools with sequential execution"""
         
         # Add user query to history
         self.conversation_history.append({"role": "user", "content": user_query})
         
         # Start with the original query and execute tools sequentially
-        return await self._execute_tools_sequentially(user_query, mcp_client, tool_descriptions)
+        return await self._execute_tools_sequentially(user_query, mcp_client)
     
-    async def _execute_tools_sequentially(self, current_query: str, mcp_client, tool_descriptions: str, executed_tools: Optional[List[Dict[str, Any]]] = None) -> str:
-        """Execute tools sequentially, using results from previous tools as input for next ones"""
+    async def _execute_tools_sequentially(self, current_query: str, mcp_client) -> str:
+        """Execute tools step by step, using results from previous tools as input for next ones.
+        Tools planned in the same step are independent and run concurrently."""
         
-        if executed_tools is None:
-            executed_tools = []
+        executed_tools: List[Dict[str, Any]] = []
+        # Context lines are appended as tools finish, so each step only formats the new results
+        context_lines: List[str] = []
+        # Key facts extracted from tool results; the planner sees these instead of the full results
+        state: Dict[str, str] = {}
+        # (tool, params) pairs already run; the planner asking for one again means it is going in circles
+        executed_calls = set()
         
-        # Build context from previously executed tools
-        context = ""
-        if executed_tools:
-            context = "\n\nPrevious tool results:\n"
-            for tool in executed_tools:
-                context += f"- {tool['tool_name']}: {tool['result']}\n"
-        
-        # Determine next tool to use
-        planning_prompt = f"""You are a helpful assistant with access to various tools through MCP (Model Context Protocol).
-
-Available tools:
-{tool_descriptions}
-
-The user originally asked: "{current_query}"{context}
-
-ANALYZE THE SITUATION:
-- What is the user asking for?
-- What tools have already been executed?
-- What information is still missing to fully answer the user's question?
-
-RULES:
-1. If the user asks for stock price and you don't have a ticker symbol, use get_ticker_from_name first
-2. If you have a ticker symbol from previous results, use get_stock_price next
-3. If the user asks for news and you have a ticker, use get_stock_news
-4. If you have all the information needed, return empty array []
-
-Respond with ONLY a JSON array with ONE tool (or empty array), in this exact format:
-[{{"tool": "tool_name", "params": {{"param1": "value1"}}}}]
-
-Examples:
-- Need ticker first: [{{"tool": "get_ticker_from_name", "params": {{"name": "Apple Inc"}}}}]
-- Have ticker, need price: [{{"tool": "get_stock_price", "params": {{"ticker": "AAPL"}}}}]
-- Have ticker, need news: [{{"tool": "get_stock_news", "params": {{"ticker": "AAPL"}}}}]
-- All done: []
-
-Do not include any explanation, just the JSON array."""
-
-        try:
-            # Get tool planning from model
-            planning_response = ollama.chat(
-                model=self.ollama_model,
-                messages=[{"role": "user", "content": planning_prompt}],
-                stream=False
-            )
+        for _ in range(MAX_PLANNING_STEPS):
+            context = ""
+            if context_lines:
+                context = f"\nKnown so far: {json.dumps(state)}\nPrevious tool results (truncated):\n" + "".join(context_lines)
             
-            planning_text = planning_response['message']['content'].strip()
-            # print("--------------------------------")
-            # print("Planning text: ", planning_text)
-            if planning_text and '<think>' in planning_text and '</think>' in planning_text:
-                start = planning_text.find('<think>')
-                end = planning_text.find('</think>') + len('</think>')
-                planning_text = planning_text[:start] + planning_text[end:] 
-            print(f"🧠 Planning: {planning_text}")
+            # Only the query and context change between steps; the static planner prompt is the system message
+            planning_prompt = f'Query: "{current_query}"{context}\nRespond JSON.'
             
-            # Parse the tool request
             try:
-                # prnt("--------------------------------")
-                # print("Plainning text: ", planning_text)
-                if planning_text:
-                    # print("Trying to parse tool requests")
-                    tool_requests = json.loads(planning_text)
-                    print(f"🔍 Parsed tool requests: {tool_requests}")
-                    
-                    if tool_requests and len(tool_requests) > 0:  # If a tool is needed
-                        tool_request = tool_requests[0]  # Take the first (and should be only) tool
-                        tool_name = tool_request.get('tool')
-                        parameters = tool_request.get('params', {})
-                        
-                        print(f"🔧 Using tool: {tool_name} with parameters: {parameters}")
-                        
-                        try:
-                            # Call the MCP tool
-                            tool_result = await mcp_client.call_tool(tool_name, parameters)
-                            tool_output = tool_result[0].text if tool_result else "No result"
-                            
-                            # Add this tool result to executed tools
-                            executed_tools.append({
-                                'tool_name': tool_name,
-                                'parameters': parameters,
-                                'result': tool_output
-                            })
-                            print(f"✅ Tool {tool_name} completed with result: {tool_output}")
-                            
-                            # Special logic for sequential tool execution
-                            # If we just got a ticker, we should continue to get price/news
-                            if tool_name == 'get_ticker_from_name' and tool_output and 'Error' not in tool_output:
-                                print("🔄 Got ticker, continuing to get stock data...")
-                            
-                            # Check if we need to execute more tools (recursive call)
-                            print(f"🔄 Checking for more tools needed after {tool_name}...")
-                            return await self._execute_tools_sequentially(current_query, mcp_client, tool_descriptions, executed_tools)
-                            
-                        except Exception as e:
-                            print(f"❌ Error with tool {tool_name}: {str(e)}")
-                            executed_tools.append({
-                                'tool_name': tool_name,
-                                'parameters': parameters,
-                                'result': f"Error: {str(e)}"
-                            })
-                            # Continue to final response even with error
-                            print("🔄 Continuing despite error...")
-                            return await self._execute_tools_sequentially(current_query, mcp_client, tool_descriptions, executed_tools)
-                    
-                    # No more tools needed - generate final response
-                    print(f"🏁 No more tools needed. Executed {len(executed_tools)} tools total.")
-                    if executed_tools:
-                        final_response = await self._generate_comprehensive_response(current_query, executed_tools)
-                        self.conversation_history.append({"role": "assistant", "content": final_response})
-                        return final_response
-                    else:
-                        # No tools were executed, generate direct response
-                        print("⚠️ No tools were executed, generating direct response")
-                        return await self._generate_direct_response(current_query)
-                        
+                cached_plan = self._replay_cached_plan(current_query, executed_tools)
+                if cached_plan is not None:
+                    # Plan cache hit - skip the planner LLM for this step
+                    tool_requests = cached_plan
+                    print(f"⚡ Cached plan: {tool_requests}")
                 else:
-                    # If parsing fails and we have executed tools, generate response based on them
-                    if executed_tools:
-                        final_response = await self._generate_comprehensive_response(current_query, executed_tools)
-                        self.conversation_history.append({"role": "assistant", "content": final_response})
-                        return final_response
-                    else:
-                        return await self._generate_direct_response(current_query)
-                    
-            except json.JSONDecodeError:
+                    # Get tool planning from model, constrained to the ToolPlan schema
+                    planning_text = await self._plan_step(planning_prompt)
+                    print(f"🧠 Planning: {planning_text}")
+                    tool_requests = [tool_call.model_dump() for tool_call in ToolPlan.model_validate_json(planning_text).tools]
+                print(f"🔍 Parsed tool requests: {tool_requests}")
+                
+            except pydantic.ValidationError:
                 print("❌ Failed to parse tool planning")
+                break
+            except Exception as e:
                 if executed_tools:
-                    final_response = await self._generate_comprehensive_response(current_query, executed_tools)
-                    self.conversation_history.append({"role": "assistant", "content": final_response})
-                    return final_response
-                else:
-                    return await self._generate_direct_response(current_query)
-                
-        except Exception as e:
-            if executed_tools:
-                final_response = await self._generate_comprehensive_response(current_query, executed_tools)
-                self.conversation_history.append({"role": "assistant", "content": final_response})
-                return final_response
-            else:
+                    break
                 return f"Error in query processing: {str(e)}"
+            
+            if not tool_requests:
+                # No more tools needed
+                print(f"🏁 No more tools needed. Executed {len(executed_tools)} tools total.")
+                if executed_tools:
+                    self._remember_plan(current_query, executed_tools)
+                break
+            
+            requested_calls = [self._call_key(t) for t in tool_requests]
+            repeated = [call[0] for call in requested_calls if call in executed_calls]
+            if repeated:
+                print(f"🔁 Planner repeated already executed tools {repeated}, stopping.")
+                break
+            
+            batch, deferred = self._partition_tool_requests(tool_requests)
+            if deferred:
+                print(f"⏳ Deferred until ticker is known: {[t.get('tool') for t in deferred]}")
+            
+            print(f"🔧 Using tools: {[(t.get('tool'), t.get('params', {})) for t in batch]}")
+            
+            # Independent tools run concurrently, results come back in request order
+            results = await asyncio.gather(*[
+                self._call_tool(mcp_client, t.get('tool'), t.get('params', {})) for t in batch
+            ])
+            executed_calls.update(self._call_key(t) for t in batch)
+            for result in results:
+                executed_tools.append(result)
+                result_id = f"r{len(executed_tools)}"
+                self._update_state(state, result_id, result)
+                context_lines.append(f"- {result_id} {result['tool_name']}: {result['result'][:PLANNER_RESULT_PREVIEW_CHARS]}\n")
+            
+            # Special logic for sequential tool execution
+            # If we just got a ticker, we should continue to get price/news
+            if any(r['tool_name'] == 'get_ticker_from_name' and not self._failed(r) for r in results):
+                print("🔄 Got ticker, continuing to get stock data...")
+            
+            print(f"🔄 Checking for more tools needed after {[r['tool_name'] for r in results]}...")
+        else:
+            print(f"⚠️ Stopped planning after {MAX_PLANNING_STEPS} steps. Executed {len(executed_tools)} tools total.")
+        
+        if executed_tools:
+            final_response = await self._generate_comprehensive_response(current_query, executed_tools)
+            self.conversation_history.append({"role": "assistant", "content": final_response})
+            return final_response
+        
+        # No tools were executed, generate direct response
+        print("⚠️ No tools were executed, generating direct response")
+        return await self._generate_direct_response(current_query)
+    
+    async def _stream_response(self, messages: List[Dict[str, str]]) -> str:
+        """Print the model's answer as it is generated and return the full text"""
+        prompt_chars = sum(len(message['content']) for message in messages)
+        stream = await self._ollama.chat(
+            model=self.ollama_model,
+            messages=messages,
+            options={"num_ctx": num_ctx_for(prompt_chars, ANSWER_RESPONSE_TOKENS, ANSWER_MIN_CTX, ANSWER_MAX_CTX)},
+            stream=True
+        )
+        
+        print("\n🤖 Assistant: ", end='', flush=True)
+        parts = []
+        think_filter = ThinkStreamFilter()
+        async for chunk in stream:
+            part = chunk['message']['content']
+            parts.append(part)
+            print(think_filter.feed(part), end='', flush=True)
+        print(think_filter.flush())
+        
+        self._response_streamed = True
+        return "".join(parts).strip()
     
     async def _generate_direct_response(self, user_query: str) -> str:
         """Generate a direct response without using tools"""
         try:
-            response = ollama.chat(
-                model=self.ollama_model,
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant. Respond naturally to the user's query."},
-                    {"role": "user", "content": user_query}
-                ],
-                stream=False
-            )
-            
-            direct_response = response['message']['content'].strip()
+            direct_response = await self._stream_response([
+                {"role": "system", "content": "You are a helpful assistant. Respond naturally to the user's query."},
+                {"role": "user", "content": user_query}
+            ])
             self.conversation_history.append({"role": "assistant", "content": direct_response})
             return direct_response
             
         except Exception as e:
             return f"Error generating response: {str(e)}"
     
+    @staticmethod
+    def _fit_results(texts: List[str], budget: int) -> List[str]:
+        """
+        Truncate tool results so their total length stays within `budget` characters: results shorter than
+        an even share are kept whole and their unused share goes to the longer ones.
+        """
+        fitted = list(texts)
+        remaining = max(budget, 0)
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        for k, i in enumerate(order):
+            share = remaining // (len(texts) - k)
+            fitted[i] = texts[i][:share]
+            remaining -= len(fitted[i])
+        return fitted
+    
     async def _generate_comprehensive_response(self, user_query: str, tool_results: List[Dict]) -> str:
         """Generate a comprehensive response based on multiple tool results"""
         
-        # Format all tool results
+        # Format all tool results, cut down to what fits the largest answer context alongside the instructions
+        budget = int((ANSWER_MAX_CTX - ANSWER_RESPONSE_TOKENS) * CHARS_PER_TOKEN) - ANSWER_PROMPT_OVERHEAD_CHARS - len(user_query)
+        results = self._fit_results([result['result'] for result in tool_results], budget)
         results_summary = []
-        for i, result in enumerate(tool_results, 1):
-            results_summary.append(f"Tool {i} ({result['tool_name']}): {result['result']}")
+        for i, (result, text) in enumerate(zip(tool_results, results), 1):
+            results_summary.append(f"Tool {i} ({result['tool_name']}): {text}")
         
         results_text = "\n\n".join(results_summary)
         
@@ -273,12 +512,7 @@ Combine and synthesize the data from all tools to give a complete answer.
 Don't mention the technical details about using tools, just give a conversational response that addresses the user's query."""
 
         try:
-            response = ollama.chat(
-                model=self.ollama_model,
-                messages=[{"role": "user", "content": prompt}],
-                stream=False
-            )
-            return response['message']['content'].strip()
+            return await self._stream_response([{"role": "user", "content": prompt}])
         except Exception as e:
             # Fallback response
             return f"Based on the collected information: {' '.join([r['result'] for r in tool_results])}"
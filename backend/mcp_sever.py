@@ -7,111 +7,162 @@ from tools.patterns import get_financial_data
 from tools.technical_analysis import TechnicalAnalysis
 from tools.fundamental_details import get_fundamental_metrics
 from tools.sector_details import get_sector_metrics
-from ollama import Client, ResponseError
-import json
+from tools._think import strip_think
+from tools._context import num_ctx_for
+from ollama import AsyncClient, ResponseError
+from cachetools import TTLCache
+import asyncio
+import hashlib
+import orjson
 
 
 mcp = FastMCP("My MCP Server")
-client = Client()
-
-def summarize_stock_data(sections):
-
-    selection_criteria = mcp._read_resource("status://details_for_selection_of_stock")
-
-    
-    # Enhanced system message for better financial analysis
-    system_msg = (
-        "You are a senior financial analyst with expertise in equity research and investment analysis. "
-        "Your task is to provide comprehensive, professional financial summaries that combine data analysis with actionable insights. "
-        "You must:\n"
-        "- Present data in a clear, structured format with proper context\n"
-        "- Identify key trends, strengths, and areas of concern\n"
-        "- Use appropriate financial terminology and industry standards\n"
-        "- Maintain objectivity while highlighting significant findings\n"
-        "- Format numbers with proper units and currency symbols\n"
-        "- Provide comparative context where relevant (industry benchmarks, historical performance)\n"
-        "- Conclude with a balanced assessment and potential implications for investors"
-        "You need to analyze the data and provide a summary of the stock based on the selection criteria."
-        f"**SELECTION CRITERIA:**\n{selection_criteria}"
-    )
-    
-    # Enhanced user message with structured analysis framework
-    user_msg = (
-        "Analyze the following stock data JSON and provide a comprehensive financial summary following this structure:\n\n"
-        "**EXECUTIVE SUMMARY**\n"
-        "- Brief overview of the company's current financial position\n"
-        "- Key highlights and concerns in 2-3 sentences\n\n"
-        "**DETAILED ANALYSIS**\n"
-        "- Extract and present ALL numerical data with proper context\n"
-        "- Group related metrics (profitability, liquidity, growth, valuation, etc.)\n"
-        "- Identify the reporting currency and ensure consistency\n"
-        "- Highlight significant trends, ratios, and performance indicators\n"
-        "- Note any unusual or standout metrics\n\n"
-        "**KEY INSIGHTS**\n"
-        "- Financial strengths and competitive advantages\n"
-        "- Areas of concern or potential risks\n"
-        "- Performance relative to typical industry standards (if applicable)\n\n"
-        "**INVESTMENT PERSPECTIVE**\n"
-        "- What this data suggests about the company's financial health\n"
-        "- Potential implications for different types of investors\n\n"
-        "Ensure your analysis is data-driven, citing specific figures from the JSON. "
-        "Present information in a way that both institutional and retail investors can understand and act upon.\n\n"
-        f"**DATA TO ANALYZE:**\n{json.dumps(sections, indent=2)}"
-    )
+client = AsyncClient()
+
+# Static selection criteria: served as a resource and embedded in every summary prompt
+DECISION_CRITERIA = (
+    "Universe – All U.S. large-caps (≥ $5 B market cap)\n"
+    "Liquidity & Size\n"
+    "• Avg. daily volume (3 mo) ≥ $20 M\n"
+    "• Market cap ≥ $5 B\n"
+    "Valuation\n"
+    "• P/E (trailing) < 25× – avoid overvaluation\n"
+    "• P/B < 3× – limit intangible risk\n"
+    "• P/S (TTM) < 3× – cap revenue multiple\n"
+    "Profitability\n"
+    "• EPS (trailing) > 0 – positive earnings\n"
+    "• ROE ≥ 15 % – strong equity returns\n"
+    "• ROA ≥ 8 % – efficient asset use\n"
+    "Growth & Quality\n"
+    "• EPS YoY growth ≥ 10 %\n"
+    "• Revenue YoY growth ≥ 8 %\n"
+    "• Debt/Equity ≤ 1.0\n"
+    "Composite Scoring\n"
+    "• Normalize each metric to 0–1\n"
+    "• Weights: 30 % valuation, 40 % profitability, 30 % growth\n"
+    "• Compute overall score & rank\n"
+    "Final Review – Analyst check for sector risks, one-off distortions\n"
+)
+
+# Invariant prompt parts are built once: every summary request then starts with a byte-identical
+# prefix, which lets Ollama reuse the KV cache for it instead of re-evaluating the system prompt
+SUMMARY_SYSTEM_MSG = (
+    "You are a senior financial analyst with expertise in equity research and investment analysis. "
+    "Your task is to provide comprehensive, professional financial summaries that combine data analysis with actionable insights. "
+    "You must:\n"
+    "- Present data in a clear, structured format with proper context\n"
+    "- Identify key trends, strengths, and areas of concern\n"
+    "- Use appropriate financial terminology and industry standards\n"
+    "- Maintain objectivity while highlighting significant findings\n"
+    "- Format numbers with proper units and currency symbols\n"
+    "- Provide comparative context where relevant (industry benchmarks, historical performance)\n"
+    "- Conclude with a balanced assessment and potential implications for investors"
+    "You need to analyze the data and provide a summary of the stock based on the selection criteria."
+    f"**SELECTION CRITERIA:**\n{DECISION_CRITERIA}"
+)
+
+SUMMARY_INSTRUCTIONS = (
+    "Analyze the following stock data JSON and provide a comprehensive financial summary following this structure:\n\n"
+    "**EXECUTIVE SUMMARY**\n"
+    "- Brief overview of the company's current financial position\n"
+    "- Key highlights and concerns in 2-3 sentences\n\n"
+    "**DETAILED ANALYSIS**\n"
+    "- Extract and present ALL numerical data with proper context\n"
+    "- Group related metrics (profitability, liquidity, growth, valuation, etc.)\n"
+    "- Identify the reporting currency and ensure consistency\n"
+    "- Highlight significant trends, ratios, and performance indicators\n"
+    "- Note any unusual or standout metrics\n\n"
+    "**KEY INSIGHTS**\n"
+    "- Financial strengths and competitive advantages\n"
+    "- Areas of concern or potential risks\n"
+    "- Performance relative to typical industry standards (if applicable)\n\n"
+    "**INVESTMENT PERSPECTIVE**\n"
+    "- What this data suggests about the company's financial health\n"
+    "- Potential implications for different types of investors\n\n"
+    "Ensure your analysis is data-driven, citing specific figures from the JSON. "
+    "Present information in a way that both institutional and retail investors can understand and act upon.\n\n"
+    "**DATA TO ANALYZE:**\n"
+)
+
+SUMMARY_MODEL = "qwen3:4b"
+# The context window is sized per request from the measured prompt (see tools/_context.py), so large payloads
+# (financial sheets) are not silently truncated and small ones do not pay for a huge KV cache
+SUMMARY_RESPONSE_TOKENS = 2048
+SUMMARY_MIN_CTX = 4096
+SUMMARY_MAX_CTX = 32768  # qwen3:4b's native context length
+
+# Identical tool payloads produce identical summaries, so recent ones are reused instead of re-running the LLM
+_SUMMARY_CACHE = TTLCache(maxsize=512, ttl=300)
+
+async def summarize_stock_data(sections):
+
+    cache_key = hashlib.blake2b(orjson.dumps(sections, option=orjson.OPT_SORT_KEYS)).hexdigest()
+    cached_summary = _SUMMARY_CACHE.get(cache_key)
+    if cached_summary is not None:
+        return cached_summary
+
+    data = sections if isinstance(sections, str) else orjson.dumps(sections).decode()
+    user_msg = SUMMARY_INSTRUCTIONS + data
+    num_ctx = num_ctx_for(len(SUMMARY_SYSTEM_MSG) + len(user_msg), SUMMARY_RESPONSE_TOKENS, SUMMARY_MIN_CTX, SUMMARY_MAX_CTX)
 
     try:
-        # 6. Call the model (non-streaming) :contentReference[oaicite:1]{index=1}
-        response = client.chat(
-            model="qwen3:4b",
+        # Async client: summaries for several tools in one request run concurrently instead of queueing
+        response = await client.chat(
+            model=SUMMARY_MODEL,
             messages=[
-                {"role": "system",  "content": system_msg},
+                {"role": "system",  "content": SUMMARY_SYSTEM_MSG},
                 {"role": "user",    "content": user_msg},
             ],
+            options={"num_ctx": num_ctx},
             stream=False
         )
     except ResponseError as e:
         raise RuntimeError(f"LLM error {e.status_code}: {e.error}")
 
-    # 7. Parse the returned JSON into our Pydantic model
     content = response.message.content
     
     # Remove any thinking content between <think> and </think> tags
-    if content and '<think>' in content and '</think>' in content:
-        start = content.find('<think>')
-        end = content.find('</think>') + len('</think>')
-        content = content[:start] + content[end:]
+    content = strip_think(content)
     
     if content is None:
         raise RuntimeError("No content returned from the model")
+    _SUMMARY_CACHE[cache_key] = content
     return content
 
+async def _tool_output(sections, summarize: bool) -> str:
+    """
+    Return the tool payload as compact JSON so the client can synthesize all tool results in one LLM call,
+    or summarize it here with the LLM when the caller asks for `summarize=True`.
+    """
+    if summarize:
+        return await summarize_stock_data(sections)
+    if isinstance(sections, str):
+        return sections
+    return orjson.dumps(sections).decode()
+
 
 @mcp.tool(description="Get the price of a stock. This can be used to get the pricing details of a stock.")
-def get_stock_price(ticker: str) -> str:
-    price = get_price(ticker=ticker)
-    price = price.model_dump_json(indent=2)
-    summary = summarize_stock_data(price)
-    return summary
+async def get_stock_price(ticker: str, summarize: bool = False) -> str:
+    price = await get_price(ticker=ticker)
+    price = price.model_dump(mode="json")
+    return await _tool_output(price, summarize)
 
 @mcp.tool(description="Get the indicator data of a stock")
-def get_stock_indicator_data(ticker: str) -> str:
-    financial_data = get_financial_data(ticker=ticker)
-    summary = summarize_stock_data(financial_data)
-    return summary
+async def get_stock_indicator_data(ticker: str, summarize: bool = False) -> str:
+    financial_data = await asyncio.to_thread(get_financial_data, ticker=ticker)
+    return await _tool_output(financial_data, summarize)
 
 @mcp.tool(description="Get Financial sheets Details of a stock. This can be used to get the financial details of a stock.")
-def get_stock_financial_sheets(ticker: str) -> str:
-    details = get_sheets_details(ticker=ticker)
-    details = details.model_dump_json(indent=2)
-    summary = summarize_stock_data(details)
-    return summary
+async def get_stock_financial_sheets(ticker: str, summarize: bool = False) -> str:
+    details = await get_sheets_details(ticker=ticker)
+    details = details.model_dump(mode="json")
+    return await _tool_output(details, summarize)
 
 @mcp.tool(description="Get the news of a stock. This can be used to get the news of a stock. Used to predict market sentiment.")
-def get_stock_news(ticker: str) -> str:
-    news = get_news(ticker=ticker)
-    news = news.model_dump_json(indent=2)
-    summary = summarize_stock_data(news)
-    return summary
+async def get_stock_news(ticker: str, summarize: bool = False) -> str:
+    news = await asyncio.to_thread(get_news, ticker=ticker)
+    news = news.model_dump(mode="json")
+    return await _tool_output(news, summarize)
 
 
 @mcp.tool(description="Get Ticker from the name of the stock. This can be used to get the ticker of a stock.",)
@@ -120,59 +171,27 @@ def get_ticker_from_name(name: str) -> dict:
     return ticker
 
 @mcp.tool(description="Get the Technical Analysis and Pattern analysis of a stock.This can be used to forecast the future price of the stock.")
-def get_stock_technical_analysis(ticker: str) -> str:
-    technical_analysis = TechnicalAnalysis(ticker=ticker)
-    data = technical_analysis.get_data_in_shape()
-    data = data.model_dump_json(indent=2)
-    summary = summarize_stock_data(data)
-    return summary
+async def get_stock_technical_analysis(ticker: str, summarize: bool = False) -> str:
+    # Download + extrema/pattern analysis is blocking, so it runs off the event loop
+    data = await asyncio.to_thread(lambda: TechnicalAnalysis(ticker=ticker).get_data_in_shape())
+    data = data.model_dump(mode="json")
+    return await _tool_output(data, summarize)
 
 @mcp.tool(description="Get the fundamental details of a stock. This can be used to get the fundamental details of a stock.")
-def get_stock_fundamental_details(ticker: str) -> str:
-    fundamental_details = get_fundamental_metrics(ticker_symbol=ticker)
-    fundamental_details = fundamental_details.model_dump_json(indent=2)
-    summary = summarize_stock_data(fundamental_details)
-    return summary
+async def get_stock_fundamental_details(ticker: str, summarize: bool = False) -> str:
+    fundamental_details = await get_fundamental_metrics(ticker_symbol=ticker)
+    fundamental_details = fundamental_details.model_dump(mode="json")
+    return await _tool_output(fundamental_details, summarize)
 
 @mcp.tool(description="sector_name and time_period is the input.Get the sector metrics of a stock. Available sectors: 'Information Technology', 'Health Care', 'Financials', 'Consumer Discretionary', 'Communication Services', 'Industrials', 'Consumer Staples', 'Utilities', 'Energy', 'Real Estate', 'Materials'. Use exact sector names as listed.Time period available: '1mo', '3mo', '6mo', '1y', '5y'")
-def get_stock_sector_metrics(sector_name: str, time_period: str = '1mo') -> str:
-    sector_metrics = get_sector_metrics(sector_name=sector_name, period=time_period)
-    sector_metrics = sector_metrics.model_dump_json(indent=2)
-    summary = summarize_stock_data(sector_metrics)
-    return summary
+async def get_stock_sector_metrics(sector_name: str, time_period: str = '1mo', summarize: bool = False) -> str:
+    sector_metrics = await get_sector_metrics(sector_name=sector_name, period=time_period)
+    sector_metrics = sector_metrics.model_dump(mode="json")
+    return await _tool_output(sector_metrics, summarize)
 
 @mcp.resource("status://details_for_selection_of_stock",description="This is a stepwise approach and all the criteria need to be monitored to get to better decisions.")
 def get_decision_criteria():
-    decision_criteria = (
-        "Universe – All U.S. large-caps (≥ $5 B market cap)\n"
-
-"Liquidity & Size\n"
-"• Avg. daily volume (3 mo) ≥ $20 M\n"
-"• Market cap ≥ $5 B\n"
-
-"Valuation\n"
-"• P/E (trailing) < 25× – avoid overvaluation\n"
-"• P/B < 3× – limit intangible risk\n"
-"• P/S (TTM) < 3× – cap revenue multiple\n"
-
-"Profitability\n"
-"• EPS (trailing) > 0 – positive earnings\n"
-"• ROE ≥ 15 % – strong equity returns\n"
-"• ROA ≥ 8 % – efficient asset use\n"
-
-"Growth & Quality\n"
-"• EPS YoY growth ≥ 10 %\n"
-"• Revenue YoY growth ≥ 8 %\n"
-"• Debt/Equity ≤ 1.0\n"
-
-"Composite Scoring\n"
-"• Normalize each metric to 0–1\n"
-"• Weights: 30 % valuation, 40 % profitability, 30 % growth\n"
-"• Compute overall score & rank\n"
-
-"Final Review – Analyst check for sector risks, one-off distortions\n"
-    )
-    return 
+    return DECISION_CRITERIA
 
 @mcp.resource("status://available_sectors", description="List of all available sectors for sector metrics analysis.")
 def get_available_sectors():
@@ -0,0 +1,14 @@
+# Ollama truncates a prompt that does not fit num_ctx from the front, silently dropping the instructions and
+# the first tool results, so every large-payload call sizes its context from the measured prompt instead.
+# qwen3's tokenizer gives every digit its own token, so number-heavy financial JSON runs at only
+# ~1.7 characters per token; 1.5 keeps the estimate on the safe side.
+CHARS_PER_TOKEN = 1.5
+
+
+def num_ctx_for(prompt_chars: int, response_tokens: int, min_ctx: int, max_ctx: int) -> int:
+    """Smallest power-of-two context (within [min_ctx, max_ctx]) holding the prompt plus the answer"""
+    needed = int(prompt_chars / CHARS_PER_TOKEN) + response_tokens
+    num_ctx = min_ctx
+    while num_ctx < needed and num_ctx < max_ctx:
+        num_ctx *= 2
+    return num_ctx
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+from tools._jit import njit, HAVE_NUMBA
+
+
+@njit(cache=True)
+def _multi_ewm_jit(close, alphas, fast_col, slow_col, signal_alpha):
+    """
+    Single pass computing several exponential moving averages of `close` at once.
+
+    Returns a float64 array of shape (n, len(alphas) + 1): column j is the EMA with smoothing
+    `alphas[j]`, and the last column is the EMA (smoothing `signal_alpha`) of
+    `column[fast_col] - column[slow_col]`, i.e. the MACD signal line.
+    Every column matches `Series.ewm(alpha=..., adjust=False).mean()`, including its NaN handling:
+    NaN until the first observation, then missing values carry the last average forward and
+    decay its weight for the next observation.
+    """
+    n = close.shape[0]
+    k = alphas.shape[0]
+    out = np.empty((n, k + 1), np.float64)
+
+    weighted = np.full(k + 1, np.nan)
+    old_wt = np.ones(k + 1)
+    rates = np.empty(k + 1)
+    rates[:k] = alphas
+    rates[k] = signal_alpha
+
+    for i in range(n):
+        for j in range(k + 1):
+            if j < k:
+                cur = close[i]
+            else:
+                # MACD line of this bar, from the averages just updated above
+                cur = weighted[fast_col] - weighted[slow_col]
+            is_observation = cur == cur
+            if weighted[j] == weighted[j]:
+                old_wt[j] *= 1.0 - rates[j]
+                if is_observation:
+                    if weighted[j] != cur:
+                        weighted[j] = (old_wt[j] * weighted[j] + rates[j] * cur) / (old_wt[j] + rates[j])
+                    old_wt[j] = 1.0
+            elif is_observation:
+                weighted[j] = cur
+            out[i, j] = weighted[j]
+
+    return out
+
+
+def _multi_ewm_pandas(close, alphas, fast_col, slow_col, signal_alpha):
+    """
+    Same result as the jitted kernel, for environments without numba: one vectorized
+    `Series.ewm(alpha=..., adjust=False).mean()` per column instead of an interpreted loop over every bar.
+    """
+    close = pd.Series(close)
+    out = np.empty((close.shape[0], alphas.shape[0] + 1), np.float64)
+    for j, alpha in enumerate(alphas):
+        out[:, j] = close.ewm(alpha=alpha, adjust=False).mean().to_numpy()
+    macd_line = pd.Series(out[:, fast_col] - out[:, slow_col])
+    out[:, -1] = macd_line.ewm(alpha=signal_alpha, adjust=False).mean().to_numpy()
+    return out
+
+
+multi_ewm = _multi_ewm_jit if HAVE_NUMBA else _multi_ewm_pandas
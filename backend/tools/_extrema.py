@@ -0,0 +1,104 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from tools._jit import njit, HAVE_NUMBA
+
+
+@njit(cache=True)
+def _find_extrema_jit(close, w):
+    """
+    Single-pass centered rolling extrema using monotonic deques.
+
+    Returns two int64 index arrays: positions where close[i] equals the max (resistance)
+    and the min (support) of the centered window of size `w`. Matches
+    `close == close.rolling(w, center=True).max()` / `.min()`: the window for position i
+    spans [i - w // 2, i - w // 2 + w - 1] and edge positions without a full window are skipped,
+    as are windows containing a NaN (pandas' rolling yields NaN there, which never compares equal).
+    """
+    n = close.shape[0]
+    offset = w // 2
+
+    # deques of indices: values decreasing (max) / increasing (min) from head to tail
+    max_dq = np.empty(n, np.int64)
+    min_dq = np.empty(n, np.int64)
+    max_head = max_tail = 0
+    min_head = min_tail = 0
+
+    res_idx = np.empty(n, np.int64)
+    sup_idx = np.empty(n, np.int64)
+    n_res = n_sup = 0
+    # position of the most recent NaN; any window starting at or before it is skipped
+    last_nan = -1
+
+    for j in range(n):
+        v = close[j]
+        if v != v:
+            # NaNs never enter the deques; the windows that contain them produce no level
+            last_nan = j
+            continue
+        while max_tail > max_head and close[max_dq[max_tail - 1]] <= v:
+            max_tail -= 1
+        max_dq[max_tail] = j
+        max_tail += 1
+        while min_tail > min_head and close[min_dq[min_tail - 1]] >= v:
+            min_tail -= 1
+        min_dq[min_tail] = j
+        min_tail += 1
+
+        start = j - w + 1
+        if start < 0 or last_nan >= start:
+            continue
+        # drop indices that slid out of the window [start, j]
+        while max_dq[max_head] < start:
+            max_head += 1
+        while min_dq[min_head] < start:
+            min_head += 1
+
+        center = start + offset
+        if close[center] == close[max_dq[max_head]]:
+            res_idx[n_res] = center
+            n_res += 1
+        if close[center] == close[min_dq[min_head]]:
+            sup_idx[n_sup] = center
+            n_sup += 1
+
+    return res_idx[:n_res].copy(), sup_idx[:n_sup].copy()
+
+
+def _find_extrema_numpy(close, w):
+    """
+    Same result as the jitted kernel, for environments without numba: max/min reductions over a
+    strided (n - w + 1, w) window view, compared against the close at each window's center.
+    A window containing a NaN reduces to NaN and never matches, like the jitted kernel's skip.
+    """
+    n = close.shape[0]
+    if n < w:
+        empty = np.empty(0, np.int64)
+        return empty, empty.copy()
+    offset = w // 2
+    windows = sliding_window_view(close, w)
+    centers = close[offset:offset + windows.shape[0]]
+    res_idx = np.flatnonzero(centers == windows.max(axis=1)) + offset
+    sup_idx = np.flatnonzero(centers == windows.min(axis=1)) + offset
+    return res_idx.astype(np.int64), sup_idx.astype(np.int64)
+
+
+find_extrema = _find_extrema_jit if HAVE_NUMBA else _find_extrema_numpy
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    # Both paths must match pandas' centered rolling max/min, including around NaNs and on ties
+    rng = np.random.default_rng(0)
+    for n, w in [(13, 3), (250, 10), (251, 11), (5, 10)]:
+        close = np.round(rng.random(n) * 5, 1)
+        close[rng.integers(0, n, size=max(1, n // 20))] = np.nan
+        series = pd.Series(close)
+        expected = (
+            np.flatnonzero(series == series.rolling(w, center=True).max()),
+            np.flatnonzero(series == series.rolling(w, center=True).min()),
+        )
+        for kernel in (_find_extrema_jit, _find_extrema_numpy):
+            got = kernel(close, w)
+            assert all(np.array_equal(g, e) for g, e in zip(got, expected)), (kernel.__name__, n, w)
+    print("find_extrema matches pandas rolling(center=True)")
@@ -0,0 +1,12 @@
+# numba is optional: without it each kernel module exports its vectorized numpy/pandas equivalent
+# (chosen on HAVE_NUMBA) instead of running the @njit loops as interpreted Python
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
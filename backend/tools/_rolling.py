@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+from tools._jit import njit, HAVE_NUMBA
+
+
+@njit(cache=True)
+def _rolling_mean_std_jit(x, w):
+    """
+    Single-pass rolling mean and sample standard deviation (ddof=1) over windows of size `w`.
+
+    Keeps a running mean and sum of squared deviations (Welford with Kahan-compensated mean),
+    adding the value entering the window and removing the one leaving it, so each step is O(1).
+    Unlike sum_sq - sum * mean this does not cancel catastrophically at price scale when a window's
+    variance is small. Follows the same update rules as pandas' rolling var, so it matches
+    `rolling(w).mean()` / `.std()`: NaN until a full window, NaN for any window containing NaN,
+    and exactly 0 for a window of identical values.
+    """
+    n = x.shape[0]
+    mean = np.full(n, np.nan)
+    std = np.full(n, np.nan)
+
+    nobs = 0
+    mean_x = 0.0
+    ssqdm = 0.0
+    comp_add = 0.0
+    comp_remove = 0.0
+    same_count = 0
+    prev_value = 0.0
+    for i in range(n):
+        if i == 0 or w == 1:
+            # first window (or non-overlapping windows): start from scratch
+            nobs = 0
+            mean_x = ssqdm = comp_add = comp_remove = 0.0
+            same_count = 0
+            prev_value = x[i]
+        elif i >= w:
+            old = x[i - w]
+            if old == old:
+                nobs -= 1
+                if nobs:
+                    prev_mean = mean_x - comp_remove
+                    y = old - comp_remove
+                    t = y - mean_x
+                    comp_remove = t + mean_x - y
+                    mean_x -= t / nobs
+                    ssqdm -= (old - prev_mean) * (old - mean_x)
+                else:
+                    mean_x = 0.0
+                    ssqdm = 0.0
+
+        v = x[i]
+        if v == v:
+            nobs += 1
+            if v == prev_value:
+                same_count += 1
+            else:
+                same_count = 1
+                prev_value = v
+            prev_mean = mean_x - comp_add
+            y = v - comp_add
+            t = y - mean_x
+            comp_add = t + mean_x - y
+            mean_x += t / nobs
+            ssqdm += (v - prev_mean) * (v - mean_x)
+
+        if nobs >= w:
+            mean[i] = mean_x
+            if nobs > 1:
+                if same_count >= nobs:
+                    std[i] = 0.0
+                else:
+                    std[i] = np.sqrt(max(ssqdm / (nobs - 1), 0.0))
+
+    return mean, std
+
+
+def _rolling_mean_std_pandas(x, w):
+    """
+    Same result as the jitted kernel, for environments without numba: pandas' vectorized
+    `rolling(w).mean()` / `.std()` instead of an interpreted loop over every bar.
+    """
+    rolling = pd.Series(x).rolling(w)
+    return rolling.mean().to_numpy(), rolling.std().to_numpy()
+
+
+rolling_mean_std = _rolling_mean_std_jit if HAVE_NUMBA else _rolling_mean_std_pandas
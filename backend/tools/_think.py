@@ -0,0 +1,61 @@
+import re
+
+THINK_OPEN = "<think>"
+THINK_CLOSE = "</think>"
+_THINK_RE = re.compile(r"<think>.*?</think>", re.DOTALL)
+
+
+def strip_think(text: str) -> str:
+    """Remove every <think>...</think> block from a model response"""
+    return _THINK_RE.sub("", text) if text else text
+
+
+def _partial_tag_len(text: str, tag: str) -> int:
+    """Length of the longest suffix of `text` that is a proper prefix of `tag` (a tag cut off mid-chunk)"""
+    for i in range(min(len(tag) - 1, len(text)), 0, -1):
+        if text.endswith(tag[:i]):
+            return i
+    return 0
+
+
+class ThinkStreamFilter:
+    """
+    Incremental strip_think for streamed responses: feed() each chunk and get back only the newly visible text.
+    Only the current chunk plus a few held-back characters (a possibly cut-off tag) are scanned per call,
+    so filtering a whole response is linear in its length.
+    """
+
+    def __init__(self):
+        self._pending = ""
+        self._in_think = False
+
+    def feed(self, chunk: str) -> str:
+        text = self._pending + chunk
+        self._pending = ""
+        visible = []
+        while text:
+            if self._in_think:
+                end = text.find(THINK_CLOSE)
+                if end == -1:
+                    # drop the thinking text, but keep a possible start of </think>
+                    keep = _partial_tag_len(text, THINK_CLOSE)
+                    self._pending = text[len(text) - keep:] if keep else ""
+                    break
+                text = text[end + len(THINK_CLOSE):]
+                self._in_think = False
+            else:
+                start = text.find(THINK_OPEN)
+                if start == -1:
+                    keep = _partial_tag_len(text, THINK_OPEN)
+                    visible.append(text[:len(text) - keep])
+                    self._pending = text[len(text) - keep:] if keep else ""
+                    break
+                visible.append(text[:start])
+                text = text[start + len(THINK_OPEN):]
+                self._in_think = True
+        return "".join(visible)
+
+    def flush(self) -> str:
+        """Text held back at the end of the stream: a trailing partial '<think' is ordinary text"""
+        text, self._pending = self._pending, ""
+        return "" if self._in_think else text
@@ -1,34 +1,45 @@
 import requests
-import time
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import List, Dict
-import yfinance as yf
+import threading
+from cachetools import TTLCache, cached
+from tools.yf_cache import get_info
 
 
+SEARCH_URL = "https://query2.finance.yahoo.com/v1/finance/search"
+HEADERS = {"User-Agent": "MyApp/1.0"}  # mimic a real browser
+MAX_RETRIES = 5
+
+# One pooled keep-alive session; urllib3 retries HTTP 429 with exponential backoff (honouring Retry-After)
+_session = requests.Session()
+_session.headers.update(HEADERS)
+_session.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=4,
+    max_retries=Retry(total=MAX_RETRIES, backoff_factor=1.0, status_forcelist=[429], allowed_methods=["GET"]),
+))
+
+# Name -> symbol lookups are stable, so the same search within a session is answered from memory
+SEARCH_CACHE = TTLCache(maxsize=256, ttl=300)
+
+
+@cached(cache=SEARCH_CACHE, lock=threading.Lock())
 def search_tickers(query: str,
                    region: str = "",
-                   lang:   str = "en",
-                   max_retries: int = 5,
-                   base_sleep:  float = 1.0
+                   lang:   str = "en"
                   ) -> List[Dict]:
     """
-    Query Yahoo Finance search with simple exponential backoff on HTTP 429.
+    Query Yahoo Finance search; the shared session retries HTTP 429 with exponential backoff.
+    Results are cached for 5 minutes; the returned list is shared and must not be mutated.
     """
-    url = "https://query2.finance.yahoo.com/v1/finance/search"
     params = {"q": query, "lang": lang, "region": region}
-    headers = {"User-Agent": "MyApp/1.0"}  # mimic a real browser
-    
-    for attempt in range(1, max_retries + 1):
-        resp = requests.get(url, params=params, headers=headers)
-        if resp.status_code == 200:
-            return resp.json().get("quotes", [])
-        elif resp.status_code == 429:
-            sleep_time = base_sleep * (2 ** (attempt - 1))
-            print(f"Rate-limited: retrying in {sleep_time:.1f}s…")
-            time.sleep(sleep_time)
-        else:
-            resp.raise_for_status()
-    
-    raise RuntimeError(f"Failed after {max_retries} retries due to rate limits.")
+    try:
+        resp = _session.get(SEARCH_URL, params=params, timeout=10)
+    except requests.exceptions.RetryError as e:
+        raise RuntimeError(f"Failed after {MAX_RETRIES} retries due to rate limits.") from e
+    resp.raise_for_status()
+    return resp.json().get("quotes", [])
 
 
 def find_and_describe(company_name: str):
@@ -39,7 +50,7 @@ def find_and_describe(company_name: str):
     # 2. Pick the top match
     symbol = candidates[0]["symbol"]
     # 3. Fetch its info
-    info = yf.Ticker(symbol).info
+    info = get_info(symbol)
     return {
         "symbol":   symbol,
         "shortName": info.get("shortName"),
@@ -1,6 +1,6 @@
-import yfinance as yf
 import pydantic
 from typing import Any
+from tools.yahoo_http import get_quote_summary
 
 class FundamentalDetails(pydantic.BaseModel):
     PE: float | Any | None
@@ -10,9 +10,9 @@ class FundamentalDetails(pydantic.BaseModel):
     PB: float | Any
     PS: float | Any
     
-def get_fundamental_metrics(ticker_symbol: str) -> FundamentalDetails:
+async def get_fundamental_metrics(ticker_symbol: str) -> FundamentalDetails:
     """
-    Fetch PE, EPS, ROE, ROA, PB and PS for a given stock using yfinance.
+    Fetch PE, EPS, ROE, ROA, PB and PS for a given stock from Yahoo's quoteSummary endpoint.
 
     Parameters
     ----------
@@ -31,8 +31,7 @@ def get_fundamental_metrics(ticker_symbol: str) -> FundamentalDetails:
           "PS":  float or None   # price / sales (trailing 12m)
         }
     """
-    tkr = yf.Ticker(ticker_symbol)
-    info = tkr.info
+    info = await get_quote_summary(ticker_symbol, "defaultKeyStatistics,financialData,summaryDetail")
 
     results = {
         "PE":  info.get("trailingPE"),
@@ -1,16 +1,15 @@
 import sys
-import yfinance as yf
 import pydantic
+from tools.yf_cache import get_news_items
 
 class News(pydantic.BaseModel):
     news_summary: str
 
 def get_news(ticker: str):
-    ticker_obj = yf.Ticker(ticker)
-    news = ticker_obj.get_news(count=20)
-    summary = ""
+    news = get_news_items(ticker, count=20)
+    parts = []
     for news_item in news:
         content = news_item['content']
-        summary += f"\nTitle:\n{content['title']}\nSummary:\n{content['summary']}\n\n"
+        parts.append(f"\nTitle:\n{content['title']}\nSummary:\n{content['summary']}\n\n")
 
-    return News(news_summary=summary)
+    return News.model_construct(news_summary="".join(parts))
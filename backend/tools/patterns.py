@@ -1,8 +1,14 @@
 import pandas as pd
 import numpy as np
-from scipy.fft import fft
-import yfinance as yf
-import json
+from scipy.fft import rfft, irfft
+from tools._ewm import multi_ewm
+from tools._rolling import rolling_mean_std
+from tools.yf_cache import get_history
+
+# EMA spans used by generate_features (EMA_14, MACD 12/26, trend 50/200), computed together in one pass
+EMA_SPANS = (12, 14, 26, 50, 200)
+MACD_SIGNAL_SPAN = 9
+
 class FinancialAnalyzer:
     """
     A class for computing financial indicators, technical analysis signals,
@@ -14,14 +20,31 @@ class FinancialAnalyzer:
         """
         Initialize with OHLCV DataFrame indexed by datetime.
         Expected columns: ['Open','High','Low','Close','Volume']
+        The frame is held by reference, not copied: methods only read it and never mutate `self.df`,
+        and callers must not modify `df` while the analyzer is in use.
         """
-        self.df = df.copy()
+        self.df = df
         self.features = pd.DataFrame(index=self.df.index)
+        self._emas = None
 
     def sma(self, window: int = 14) -> pd.Series:
         return self.df['Close'].rolling(window).mean()
 
+    def _ema_table(self) -> dict:
+        """
+        EMAs for every span in EMA_SPANS plus the default MACD signal line, computed once in a single jitted pass.
+        """
+        if self._emas is None:
+            close = self.df['Close'].to_numpy(dtype=np.float64)
+            alphas = 2.0 / (np.array(EMA_SPANS, dtype=np.float64) + 1.0)
+            table = multi_ewm(close, alphas, EMA_SPANS.index(12), EMA_SPANS.index(26), 2.0 / (MACD_SIGNAL_SPAN + 1.0))
+            self._emas = {span: table[:, i] for i, span in enumerate(EMA_SPANS)}
+            self._emas['signal'] = table[:, -1]
+        return self._emas
+
     def ema(self, window: int = 14) -> pd.Series:
+        if window in EMA_SPANS:
+            return pd.Series(self._ema_table()[window], index=self.df.index, name='Close')
         return self.df['Close'].ewm(span=window, adjust=False).mean()
 
     def rsi(self, window: int = 14) -> pd.Series:
@@ -33,58 +56,79 @@ class FinancialAnalyzer:
         rs = ma_up / ma_down
         return 100 - (100 / (1 + rs))
 
+    def _macd_columns(self, fast: int = 12, slow: int = 26, signal: int = 9) -> dict:
+        macd_line = self.ema(fast).to_numpy() - self.ema(slow).to_numpy()
+        if (fast, slow, signal) == (12, 26, MACD_SIGNAL_SPAN):
+            signal_line = self._ema_table()['signal']
+        else:
+            signal_line = pd.Series(macd_line).ewm(span=signal, adjust=False).mean().to_numpy()
+        return {'MACD': macd_line, 'Signal': signal_line, 'Hist': macd_line - signal_line}
+
     def macd(self, fast: int = 12, slow: int = 26, signal: int = 9) -> pd.DataFrame:
-        ema_fast = self.ema(fast)
-        ema_slow = self.ema(slow)
-        macd_line = ema_fast - ema_slow
-        signal_line = macd_line.ewm(span=signal, adjust=False).mean()
-        hist = macd_line - signal_line
-        return pd.DataFrame({'MACD': macd_line, 'Signal': signal_line, 'Hist': hist}, index=self.df.index)
+        return pd.DataFrame(self._macd_columns(fast, slow, signal), index=self.df.index)
+
+    def _bollinger_columns(self, window: int = 20, num_std: float = 2.0) -> dict:
+        # Mean and sample std from one pass of running sums instead of two rolling passes
+        ma, std = rolling_mean_std(self.df['Close'].to_numpy(dtype=np.float64), window)
+        return {'BB_upper': ma + num_std * std, 'BB_middle': ma, 'BB_lower': ma - num_std * std}
 
     def bollinger_bands(self, window: int = 20, num_std: float = 2.0) -> pd.DataFrame:
-        ma = self.sma(window)
-        std = self.df['Close'].rolling(window).std()
-        upper = ma + num_std * std
-        lower = ma - num_std * std
-        return pd.DataFrame({'BB_upper': upper, 'BB_middle': ma, 'BB_lower': lower}, index=self.df.index)
+        return pd.DataFrame(self._bollinger_columns(window, num_std), index=self.df.index)
+
+    def _candlestick_columns(self) -> dict:
+        # Plain float64 arrays: no index alignment or intermediate Series per comparison
+        o, c, h, l = (self.df[k].to_numpy(dtype=np.float64) for k in ('Open', 'Close', 'High', 'Low'))
+        hl = h - l
+        co = c - o
+        body = np.abs(co)
+        # Same test as np.isclose(o, c, atol=0.1 * hl), including its default rtol term
+        doji = body <= 0.1 * hl + 1e-05 * np.abs(c)
+        hammer = (body < 0.3 * hl) & ((np.minimum(o, c) - l) > 2 * body)
+        # Previous-bar comparisons via slicing; the first bar has no predecessor
+        bullish = np.zeros(len(c), dtype=bool)
+        bearish = np.zeros(len(c), dtype=bool)
+        prev_co = co[:-1]
+        bullish[1:] = (co[1:] > 0) & (prev_co < 0) & (co[1:] > -prev_co)
+        bearish[1:] = (co[1:] < 0) & (prev_co > 0) & (-co[1:] > prev_co)
+        return {'Doji': doji, 'Hammer': hammer, 'Bullish_Engulfing': bullish, 'Bearish_Engulfing': bearish}
 
     def detect_candlestick_patterns(self) -> pd.DataFrame:
-        o, c, h, l = self.df['Open'], self.df['Close'], self.df['High'], self.df['Low']
-        patterns = {
-            'Doji': np.isclose(o, c, atol=(h - l) * 0.1),
-            'Hammer': (abs(c - o) < (h - l) * 0.3) & ((np.minimum(o, c) - l) > abs(c - o) * 2)
-        }
-        prev_o, prev_c = o.shift(1), c.shift(1)
-        patterns['Bullish_Engulfing'] = (c > o) & (prev_c < prev_o) & ((c - o) > (prev_o - prev_c))
-        patterns['Bearish_Engulfing'] = (c < o) & (prev_c > prev_o) & ((o - c) > (prev_c - prev_o))
-        return pd.DataFrame(patterns, index=self.df.index)
+        return pd.DataFrame(self._candlestick_columns(), index=self.df.index)
 
-    def fourier_patterns(self, n_components: int = 5) -> pd.DataFrame:
+    def _fourier_columns(self, n_components: int = 5) -> dict:
         close = self.df['Close'].ffill().values
-        freq = fft(close)
+        # Real input: rfft keeps only the non-negative frequencies (conjugate symmetry), half the bins
+        freq = rfft(close)
         filt = np.zeros_like(freq)
-        idxs = np.argsort(np.abs(freq))[-n_components:]
+        k = min(n_components, len(freq))
+        idxs = np.argpartition(np.abs(freq), -k)[-k:]
         filt[idxs] = freq[idxs]
-        recon = np.fft.ifft(filt).real
-        return pd.DataFrame({'FFT_trend': recon}, index=self.df.index)
+        return {'FFT_trend': irfft(filt, n=len(close))}
+
+    def fourier_patterns(self, n_components: int = 5) -> pd.DataFrame:
+        return pd.DataFrame(self._fourier_columns(n_components), index=self.df.index)
 
     def determine_trend(self) -> pd.Series:
-        ema50 = self.ema(50)
-        ema200 = self.ema(200)
-        return pd.Series(np.where(ema50 > ema200, 'uptrend', 'downtrend'), index=self.df.index)
+        # int8 codes behind a two-category Categorical instead of an object column of Python strings
+        codes = (self.ema(50).to_numpy() > self.ema(200).to_numpy()).astype(np.int8)
+        return pd.Series(pd.Categorical.from_codes(codes, categories=['downtrend', 'uptrend']), index=self.df.index)
 
     def generate_features(self) -> pd.DataFrame:
         """
         Compute all indicators and patterns, consolidate into features DataFrame.
         """
-        df_feat = pd.DataFrame(index=self.df.index)
-        df_feat['SMA_14'] = self.sma(14)
-        df_feat['EMA_14'] = self.ema(14)
-        df_feat['RSI_14'] = self.rsi(14)
-        df_feat = pd.concat([df_feat, self.macd(), self.bollinger_bands(),
-                              self.detect_candlestick_patterns(), self.fourier_patterns()], axis=1)
-        df_feat['Trend'] = self.determine_trend()
-        return df_feat.dropna()
+        # Collect plain arrays and build the frame once, instead of concatenating per-indicator frames
+        cols = {
+            'SMA_14': self.sma(14).to_numpy(),
+            'EMA_14': self.ema(14).to_numpy(),
+            'RSI_14': self.rsi(14).to_numpy(),
+        }
+        cols.update(self._macd_columns())
+        cols.update(self._bollinger_columns())
+        cols.update(self._candlestick_columns())
+        cols.update(self._fourier_columns())
+        cols['Trend'] = self.determine_trend().array
+        return pd.DataFrame(cols, index=self.df.index).dropna()
 
     def to_jsons(self,
                 sample_interval = None,
@@ -101,14 +145,14 @@ class FinancialAnalyzer:
             df = df.tail(last_n)
         if sample_interval:
             df = df.iloc[::sample_interval]
+        # 4 decimals is plenty for prices and indicators, and every trimmed digit is a prompt token saved
+        df = df.round(4)
         return df.reset_index().to_json(orient=orient,date_format="iso")
 
 def get_financial_data(ticker: str) -> str:
-    df = yf.Ticker(ticker).history(period="1y")
+    df = get_history(ticker, period="1y")
     fe = FinancialAnalyzer(df)
-    feats = fe.generate_features()
-    feats = fe.to_jsons(sample_interval=10)
-    feats = json.dumps(feats)
-    return feats
+    # to_jsons already returns a JSON string; dumping it again would double-encode it
+    return fe.to_jsons(sample_interval=10)
 
 # print(get_financial_data("SUZLON.NS"))
\ No newline at end of file
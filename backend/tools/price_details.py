@@ -1,32 +1,107 @@
-import yfinance as yf
+import asyncio
 import pydantic
 import pandas as pd
 from typing import Any
+from tools.yahoo_http import get_chart, get_quote_summary_modules, flatten_modules
+
+# Modules that make up `yf.Ticker(...).info`, plus the two that back the earnings history/estimate tables
+INFO_MODULES = ("summaryDetail", "defaultKeyStatistics", "assetProfile", "quoteType", "price", "financialData")
+PRICE_MODULES = ",".join(INFO_MODULES + ("earningsHistory", "earningsTrend"))
+
+# Columnar (one list per column) models: typed lists let pydantic skip walking `Any` values
+class HistoricalPrices(pydantic.BaseModel):
+    date: list[str]
+    open: list[float]
+    high: list[float]
+    low: list[float]
+    close: list[float]
+    volume: list[float]
+
+    model_config = pydantic.ConfigDict(frozen=True, ser_json_inf_nan='constants')
+
+class EarningsHistory(pydantic.BaseModel):
+    quarter: list[str]
+    eps_estimate: list[float | None]
+    eps_actual: list[float | None]
+    eps_difference: list[float | None]
+    surprise_percent: list[float | None]
+
+    model_config = pydantic.ConfigDict(frozen=True, ser_json_inf_nan='constants')
+
+class EarningsEstimate(pydantic.BaseModel):
+    period: list[str]
+    avg: list[float | None]
+    low: list[float | None]
+    high: list[float | None]
+    year_ago_eps: list[float | None]
+    number_of_analysts: list[float | None]
+    growth: list[float | None]
+
+    model_config = pydantic.ConfigDict(frozen=True, ser_json_inf_nan='constants')
 
 class Price(pydantic.BaseModel):
-    company_information: dict[Any, Any]
-    current_price: float | Any
-    historical_prices: list[dict[Any, Any]]
-    earnings_history: dict[Any, Any] | pd.DataFrame
-    estimates: dict[Any, Any] | pd.DataFrame
-    
-    model_config = pydantic.ConfigDict(arbitrary_types_allowed=True)
-
-def get_price(ticker: str):
-    ticker_obj = yf.Ticker(ticker)
-    company_information = ticker_obj.info
-    current_price = ticker_obj.get_analyst_price_targets()
-    historical_prices = ticker_obj.history()
-    historical_prices = historical_prices.to_dict(orient="records")
-    earnings_history = ticker_obj.get_earnings_history(as_dict=True)
-    estimates = ticker_obj.get_earnings_estimate(as_dict=True)
+    company_information: dict[str, Any]
+    current_price: float | None
+    historical_prices: HistoricalPrices
+    earnings_history: EarningsHistory
+    estimates: EarningsEstimate
+
+    model_config = pydantic.ConfigDict(frozen=True, ser_json_inf_nan='constants')
+
+def _column(df: pd.DataFrame | None, name: str) -> list:
+    """Return a column as a plain list, or an empty list when there is no such data"""
+    if df is None or name not in df:
+        return []
+    return df[name].tolist()
+
+def _index(df: pd.DataFrame | None) -> list[str]:
+    if df is None:
+        return []
+    return df.index.astype(str).tolist()
+
+def _raw(item: dict, key: str):
+    value = item.get(key)
+    return value.get("raw") if isinstance(value, dict) else value
+
+async def get_price(ticker: str):
+    # Company info, analyst targets and both earnings tables come from one quoteSummary request,
+    # fetched together with the chart on the shared HTTP/2 client
+    summary_modules, historical_prices = await asyncio.gather(
+        get_quote_summary_modules(ticker, PRICE_MODULES),
+        get_chart(ticker),
+    )
+    history = summary_modules["earningsHistory"].get("history") or []
+    # Same rows as yfinance's get_earnings_estimate: the first four periods of earningsTrend
+    trend = (summary_modules["earningsTrend"].get("trend") or [])[:4]
+    estimates = [item.get("earningsEstimate") or {} for item in trend]
     return Price(
-        company_information=company_information,
-        current_price=current_price['current'],
-        historical_prices=historical_prices,
-        earnings_history=earnings_history,
-        estimates=estimates
+        company_information=flatten_modules(summary_modules, INFO_MODULES),
+        current_price=_raw(summary_modules["financialData"], "currentPrice"),
+        historical_prices=HistoricalPrices(
+            date=_index(historical_prices),
+            open=_column(historical_prices, 'Open'),
+            high=_column(historical_prices, 'High'),
+            low=_column(historical_prices, 'Low'),
+            close=_column(historical_prices, 'Close'),
+            volume=_column(historical_prices, 'Volume'),
+        ),
+        earnings_history=EarningsHistory(
+            quarter=[(item.get("quarter") or {}).get("fmt") or "" for item in history],
+            eps_estimate=[_raw(item, "epsEstimate") for item in history],
+            eps_actual=[_raw(item, "epsActual") for item in history],
+            eps_difference=[_raw(item, "epsDifference") for item in history],
+            surprise_percent=[_raw(item, "surprisePercent") for item in history],
+        ),
+        estimates=EarningsEstimate(
+            period=[item.get("period") or "" for item in trend],
+            avg=[_raw(e, "avg") for e in estimates],
+            low=[_raw(e, "low") for e in estimates],
+            high=[_raw(e, "high") for e in estimates],
+            year_ago_eps=[_raw(e, "yearAgoEps") for e in estimates],
+            number_of_analysts=[_raw(e, "numberOfAnalysts") for e in estimates],
+            growth=[_raw(e, "growth") for e in estimates],
+        ),
     )
 
 if __name__ == "__main__":
-    print(get_price("AAPL"))
\ No newline at end of file
+    print(asyncio.run(get_price("AAPL")))
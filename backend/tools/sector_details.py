@@ -1,9 +1,25 @@
 # sector_info.py
 
-import yfinance as yf
+import asyncio
 import pydantic
+from tools.yahoo_http import get_chart, get_quote_summary
 
 # Map human‐readable sector names → representative ETFs
+SECTOR_ETF_MAP = {
+    'Information Technology': 'XLK',
+    'Health Care':             'XLV',
+    'Financials':              'XLF',
+    'Consumer Discretionary':  'XLY',
+    'Communication Services':  'XLC',
+    'Industrials':             'XLI',
+    'Consumer Staples':        'XLP',
+    'Utilities':               'XLU',
+    'Energy':                  'XLE',
+    'Real Estate':             'XLRE',
+    'Materials':               'XLB'
+}
+# Case-insensitive lookup so e.g. "information technology" works
+_SECTOR_LOOKUP = {name.lower(): etf for name, etf in SECTOR_ETF_MAP.items()}
 
 class SectorMetrics(pydantic.BaseModel):
 
@@ -14,8 +30,8 @@ class SectorMetrics(pydantic.BaseModel):
     forwardPE: float | None
     dividendYield: float | None
 
-def get_sector_metrics(sector_name: str,
-                       period: str = '1mo') -> SectorMetrics:
+async def get_sector_metrics(sector_name: str,
+                             period: str = '1mo') -> SectorMetrics:
     """
     Fetches:
       • growth_pct     – % price change over `period` (e.g. '1mo', '3mo', '1y')
@@ -25,7 +41,7 @@ def get_sector_metrics(sector_name: str,
     for the ETF proxying your chosen sector.
 
     Args:
-      sector_name: one of the keys in SECTOR_ETF_MAP
+      sector_name: one of the keys in SECTOR_ETF_MAP (case-insensitive)
       period:       any yfinance‐supported string (e.g. '5d','1mo','6mo','1y','5y')
 
     Returns:
@@ -38,36 +54,22 @@ def get_sector_metrics(sector_name: str,
         'dividendYield':  float | None
       }
     """
-    #avialable sectors
-
-    SECTOR_ETF_MAP = {
-        'Information Technology': 'XLK',
-        'Health Care':             'XLV',
-        'Financials':              'XLF',
-        'Consumer Discretionary':  'XLY',
-        'Communication Services':  'XLC',
-        'Industrials':             'XLI',
-        'Consumer Staples':        'XLP',
-        'Utilities':               'XLU',
-        'Energy':                  'XLE',
-        'Real Estate':             'XLRE',
-        'Materials':               'XLB'
-    }
-    etf = SECTOR_ETF_MAP.get(sector_name)
+    etf = _SECTOR_LOOKUP.get(sector_name.strip().lower())
     if not etf:
         raise ValueError(f"Unknown sector: {sector_name!r}. "
                          f"Valid names: {list(SECTOR_ETF_MAP)}")
 
-    tkr = yf.Ticker(etf)
-    # historical close prices
-    hist = tkr.history(period=period)
+    # historical close prices and valuation fields are independent requests
+    hist, info = await asyncio.gather(
+        get_chart(etf, period=period),
+        get_quote_summary(etf, "defaultKeyStatistics,summaryDetail"),
+    )
     if hist.empty:
         raise RuntimeError(f"No price data for {etf} over period {period!r}")
 
     start, end = hist['Close'].iloc[0], hist['Close'].iloc[-1]
     growth_pct = (end - start) / start * 100
 
-    info = tkr.info
     return SectorMetrics(
         sector=sector_name,
         period=period,
@@ -79,4 +81,4 @@ def get_sector_metrics(sector_name: str,
 
 if __name__ == '__main__':
     # quick test
-    print(get_sector_metrics('Information Technology', period='1y'))
+    print(asyncio.run(get_sector_metrics('Information Technology', period='1y')))
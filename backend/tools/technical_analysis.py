@@ -1,15 +1,44 @@
-from trace import Trace
-import matplotlib.pyplot as plt
-import yfinance as yf
+from dataclasses import dataclass
 import pydantic
 import pandas as pd
 import numpy as np
+from tools._extrema import find_extrema
+from tools.yf_cache import get_history
 
 def get_data(ticker: str):
-    ticker_obj = yf.Ticker(ticker)
-    data = ticker_obj.history(period="1y")
-    return data
+    # Shared, TTL-cached frame: TechnicalAnalysis only reads it
+    return get_history(ticker, period="1y")
 
+def _slope(x: np.ndarray, y: np.ndarray) -> float:
+    """Least-squares slope of y on x, cov(x, y) / var(x), without polyfit's lstsq machinery"""
+    x = x - x.mean()
+    return float((x * (y - y.mean())).sum() / (x * x).sum())
+
+NS_PER_DAY = 86_400_000_000_000
+
+@dataclass
+class Levels:
+    """
+    Support or resistance levels as parallel arrays (one entry per level, in date order).
+    date_ns holds UTC nanoseconds since the epoch; score is the time-weighted score in [0, 1].
+    """
+    date_ns: np.ndarray
+    close: np.ndarray
+    score: np.ndarray
+
+    @classmethod
+    def empty(cls) -> "Levels":
+        return cls(np.empty(0, np.int64), np.empty(0, np.float64), np.empty(0, np.float64))
+
+    def __len__(self) -> int:
+        return len(self.date_ns)
+
+    def dates(self, tz=None) -> pd.DatetimeIndex:
+        """The level dates as a DatetimeIndex, converted to `tz` (e.g. the history's exchange timezone)"""
+        dates = pd.DatetimeIndex(self.date_ns.view('M8[ns]'))
+        return dates.tz_localize('UTC').tz_convert(tz) if tz is not None else dates
+
+# Built with model_construct from values this module already typed: validation would only re-walk them
 class TechnicalAnalysisResult(pydantic.BaseModel):
     Ressistance_levels: str | None
     Support_levels: str | None
@@ -22,18 +51,25 @@ class TechnicalAnalysis:
     def __init__(self, ticker: str):
         self.ticker = ticker
         self.data = get_data(ticker)
+        # Level dates are read straight off the index as int64 nanoseconds, so it must already be datetime-typed
+        if not self.data.empty and self.data.index.dtype.kind != 'M':
+            raise TypeError(f"Expected a DatetimeIndex for {ticker!r}, got {self.data.index.dtype}")
         # Initialize these attributes to avoid AttributeError
-        self.res_df = pd.DataFrame()
-        self.sup_df = pd.DataFrame()
+        self.res_levels = Levels.empty()
+        self.sup_levels = Levels.empty()
         self.trend_data = pd.DataFrame()
         self.triangle_pattern = {}
+        # Levels only depend on self.data, so they are computed once per instance
+        self._levels_done = False
 
     def get_resistance_and_support_levels(self):
+        if self._levels_done:
+            return self.res_levels, self.sup_levels
+        self._levels_done = True
+        
         # Handle empty data case
         if self.data.empty:
-            self.res_df = pd.DataFrame({'Date': [], 'Close': [], 'Type': [], 'Window': []})
-            self.sup_df = pd.DataFrame({'Date': [], 'Close': [], 'Type': [], 'Window': []})
-            return self.res_df, self.sup_df
+            return self.res_levels, self.sup_levels
             
         # assume df is your DataFrame, indexed by DateTimeIndex, with column 'Close'
         close = self.data['Close']
@@ -43,78 +79,40 @@ class TechnicalAnalysis:
             '2-weeks': 10,   # approx. 2 trading weeks
         }
 
-        all_res_df = []
-        all_sup_df = []
-
+        close_values = close.to_numpy(dtype=np.float64)
+        # int64 UTC nanoseconds straight from the DatetimeIndex, no per-row Timestamp objects
+        date_values = close.index.as_unit('ns').asi8
+        res_pos = []
+        sup_pos = []
         for label, w in windows.items():
-            # compute rolling max/min over a centered window of size w
-            roll_max = close.rolling(window=w, center=True).max()
-            roll_min = close.rolling(window=w, center=True).min()
-            
-            # resistance points: today's close equals the window max
-            is_resistance = close == roll_max
-            # support points: today's close equals the window min
-            is_support   = close == roll_min
-            
-            # collect them
-            res_df = pd.DataFrame({
-                'Date':      close.index,
-                'Close':     close.values,
-                'Type':      ['Resistance'] * len(self.data),
-                'Window':    label
-            })[is_resistance.values]
-            
-            sup_df = pd.DataFrame({
-                'Date':      close.index,
-                'Close':     close.values,
-                'Type':      ['Support'] * len(self.data),
-                'Window':    label
-            })[is_support.values]
-            
-            all_res_df.append(res_df)
-            all_sup_df.append(sup_df)
+            # positions where today's close equals the max / min of the centered window of size w
+            res_idx, sup_idx = find_extrema(close_values, w)
+            res_pos.append(res_idx)
+            sup_pos.append(sup_idx)
 
-        # Combine all resistance and support dataframes
-        if all_res_df:
-            self.res_df = pd.concat(all_res_df, ignore_index=True)
-            self.res_df['Date'] = pd.to_datetime(self.res_df['Date'])
-        else:
-            self.res_df = pd.DataFrame({'Date': [], 'Close': [], 'Type': [], 'Window': []})
-            
-        if all_sup_df:
-            self.sup_df = pd.concat(all_sup_df, ignore_index=True)
-            self.sup_df['Date'] = pd.to_datetime(self.sup_df['Date'])
-        else:
-            self.sup_df = pd.DataFrame({'Date': [], 'Close': [], 'Type': [], 'Window': []})
-        
-        self.get_score_time_weighted()
-            
-        return self.res_df, self.sup_df
+        self.res_levels = self._levels_at(date_values, close_values, np.concatenate(res_pos))
+        self.sup_levels = self._levels_at(date_values, close_values, np.concatenate(sup_pos))
+        return self.res_levels, self.sup_levels
+
+    @classmethod
+    def _levels_at(cls, date_values: np.ndarray, close_values: np.ndarray, positions: np.ndarray) -> Levels:
+        """Gather the levels at `positions` in date order and attach their time-weighted score"""
+        date_ns = date_values[positions]
+        order = np.argsort(date_ns, kind='stable')
+        date_ns = date_ns[order]
+        return Levels(date_ns=date_ns, close=close_values[positions][order], score=cls._time_weighted_score(date_ns))
     
-    def get_score_time_weighted(self):
-        if self.res_df.empty or self.sup_df.empty:
-            return
-            
-        min_date_res = self.res_df['Date'].min()
-        max_date_res = self.res_df['Date'].max()
-        min_date_sup = self.sup_df['Date'].min()
-        max_date_sup = self.sup_df['Date'].max()
-        
-        if min_date_res != max_date_res:
-            self.res_df['Score'] = (
-                (self.res_df['Date'] - min_date_res)
-                / (max_date_res - min_date_res)
-            ).astype(float)
-        else:
-            self.res_df['Score'] = 0.0
-            
-        if min_date_sup != max_date_sup:
-            self.sup_df['Score'] = (
-                (self.sup_df['Date'] - min_date_sup)
-                / (max_date_sup - min_date_sup)
-            ).astype(float)
-        else:
-            self.sup_df['Score'] = 0.0
+    @staticmethod
+    def _time_weighted_score(date_ns: np.ndarray) -> np.ndarray:
+        """Min-max normalize int64 nanosecond dates to [0, 1]"""
+        if len(date_ns) == 0:
+            return np.empty(0, np.float64)
+        ts = date_ns.astype(np.float64)
+        ts_min = ts.min()
+        span = ts.max() - ts_min
+        if span == 0:
+            return np.zeros_like(ts)
+        return (ts - ts_min) / span
     
 
     def plot_support_resistance(
@@ -138,13 +136,16 @@ class TechnicalAnalysis:
         figsize : tuple, default (12,6)
             Figure size in inches.
         """
-        if self.res_df.empty and self.sup_df.empty:
+        # Imported here so the MCP server never pays matplotlib's import/backend setup for a debug-only plot
+        import matplotlib.pyplot as plt
+
+        if not len(self.res_levels) and not len(self.sup_levels):
             print("No support or resistance data to plot")
             return
             
-        # split out supports and resistances
-        supports    = self.sup_df[self.sup_df['Type'] == 'Support']
-        resistances = self.res_df[self.res_df['Type'] == 'Resistance']
+        tz = self.data.index.tz
+        supports    = pd.DataFrame({'Date': self.sup_levels.dates(tz), 'Close': self.sup_levels.close})
+        resistances = pd.DataFrame({'Date': self.res_levels.dates(tz), 'Close': self.res_levels.close})
 
         plt.figure(figsize=figsize)
         # 1) full close price
@@ -215,25 +216,18 @@ class TechnicalAnalysis:
             - Duration   : list of days from start for each point
             - Levels     : array of the N prices used
         """
-        # Ensure we have the resistance and support levels
-        if self.res_df.empty and self.sup_df.empty:
-            self.get_resistance_and_support_levels()
+        # Ensure we have the resistance and support levels (no-op once computed)
+        self.get_resistance_and_support_levels()
             
-        # ensure correct dtypes
-        df = pd.concat([self.res_df, self.sup_df])
-        if df.empty:
+        if not len(self.res_levels) and not len(self.sup_levels):
             # Return empty result
             self.trend_data = pd.DataFrame({'Type': [], 'Count': [], 'Slope': [], 'Trend': [], 'Duration': [], 'Levels': []})
             return self.trend_data
-            
-        df['Date'] = pd.to_datetime(df['Date'])
         
         out = []
-        for etype in ['Support', 'Resistance']:
-            sub = df[df['Type'] == etype].sort_values('Date')
-            lastN = sub.tail(N)
-            dates = list(lastN['Date'])
-            levels = lastN['Close'].to_numpy()
+        # levels are kept in date order, so the last N are a plain slice
+        for etype, src in [('Support', self.sup_levels), ('Resistance', self.res_levels)]:
+            levels = src.close[-N:]
             cnt    = len(levels)
             
             if cnt < 2:
@@ -243,9 +237,9 @@ class TechnicalAnalysis:
                 duration = [0] if cnt == 1 else []
             else:
                 # x = [0,1,2,...], y = levels
-                x = np.arange(cnt)
-                m, _ = np.polyfit(x, levels, 1)
-                slope = float(m)
+                x = np.arange(cnt, dtype=np.float64)
+                m = _slope(x, levels)
+                slope = m
                 if m > 0:
                     trend = 'uptrend'
                 elif m < 0:
@@ -267,11 +261,10 @@ class TechnicalAnalysis:
         return self.trend_data
     
     def detect_triangle_pattern(self, months=6, tol=1e-3):
-        # Ensure we have the resistance and support levels
-        if self.res_df.empty and self.sup_df.empty:
-            self.get_resistance_and_support_levels()
+        # Ensure we have the resistance and support levels (no-op once computed)
+        self.get_resistance_and_support_levels()
             
-        if self.res_df.empty and self.sup_df.empty:
+        if not len(self.res_levels) and not len(self.sup_levels):
             self.triangle_pattern = {
                 'support_slope': np.nan,
                 'resistance_slope': np.nan,
@@ -279,29 +272,24 @@ class TechnicalAnalysis:
             }
             return self.triangle_pattern
             
-        df = pd.concat([self.res_df, self.sup_df])
-        df['Date'] = pd.to_datetime(df['Date'])
-        
-        # 1) filter to last `months` months
-        cutoff = df['Date'].max() - pd.DateOffset(months=months)
-        recent = df[df['Date'] >= cutoff]
+        # 1) filter to last `months` months (of the most recent level of either type)
+        latest_ns = max(src.date_ns[-1] for src in (self.res_levels, self.sup_levels) if len(src))
+        # calendar-month offset in the exchange timezone, as on the original Timestamps
+        cutoff = pd.Timestamp(latest_ns, tz='UTC').tz_convert(self.data.index.tz) - pd.DateOffset(months=months)
+        cutoff_ns = cutoff.value
         
         # helper to compute slope of price vs time (in days)
-        def get_slope(sub):
-            if len(sub) < 2:
+        def get_slope(src):
+            recent = src.date_ns >= cutoff_ns
+            if recent.sum() < 2:
                 return np.nan
-            # x = days since cutoff
-            x = (sub['Date'] - cutoff).dt.days.values.astype(float)
-            y = sub['Close'].values.astype(float)
-            m, _ = np.polyfit(x, y, 1)
-            return m
+            # x = whole days since cutoff
+            x = ((src.date_ns[recent] - cutoff_ns) // NS_PER_DAY).astype(np.float64)
+            return _slope(x, src.close[recent])
         
         # 2) compute slopes
-        sup_recent = recent[recent['Type']=='Support']
-        res_recent = recent[recent['Type']=='Resistance']
-        
-        sup_slope = get_slope(sup_recent)
-        res_slope = get_slope(res_recent)
+        sup_slope = get_slope(self.sup_levels)
+        res_slope = get_slope(self.res_levels)
         
         # 3) decide pattern
         if (sup_slope >  tol) and (abs(res_slope) <= tol):
@@ -318,10 +306,21 @@ class TechnicalAnalysis:
         }
         return self.triangle_pattern
     
+    @staticmethod
+    def _strong_levels_json(levels: Levels, min_score: float = 0.7) -> str | None:
+        """Records of the recent (score > min_score) levels; the only place a DataFrame is built from them"""
+        strong = levels.score > min_score
+        if not strong.any():
+            return None
+        return pd.DataFrame({
+            'Close': levels.close[strong],
+            'Difficult_to_cross_score': levels.score[strong],
+        }).to_json(orient='records', date_format='iso')
+
     def get_data_in_shape(self):
         # Handle case where no data is available
         if self.data.empty:
-            return TechnicalAnalysisResult(
+            return TechnicalAnalysisResult.model_construct(
                 Ressistance_levels=None,
                 Support_levels=None,
                 trend=[],
@@ -329,17 +328,9 @@ class TechnicalAnalysis:
                 triangle_pattern={'pattern': 'no_data', 'support_slope': None, 'resistance_slope': None}
             )
             
-        res_df, sup_df = self.get_resistance_and_support_levels() 
-        res_df_filtered = res_df[res_df['Score'] > 0.7]
-        sup_df_filtered = sup_df[sup_df['Score'] > 0.7]
-        res_df_filtered = res_df_filtered.drop(columns = ['Date','Type','Window'])
-        sup_df_filtered = sup_df_filtered.drop(columns = ['Date','Type','Window'])
-        res_df_filtered['Difficult_to_cross_score'] = res_df_filtered['Score']
-        sup_df_filtered['Difficult_to_cross_score'] = sup_df_filtered['Score']
-        res_df_filtered.drop(columns = ['Score'], inplace = True)
-        sup_df_filtered.drop(columns = ['Score'], inplace = True)
-        res_json = res_df_filtered.to_json(orient='records', date_format='iso') if not res_df_filtered.empty else None
-        sup_json = sup_df_filtered.to_json(orient='records', date_format='iso') if not sup_df_filtered.empty else None
+        res_levels, sup_levels = self.get_resistance_and_support_levels() 
+        res_json = self._strong_levels_json(res_levels)
+        sup_json = self._strong_levels_json(sup_levels)
         
         trend_data_df = self.analyze_extrema_trends()
         trend_data = trend_data_df.to_dict('records') if not trend_data_df.empty else []
@@ -351,11 +342,11 @@ class TechnicalAnalysis:
         
         triangle_data = self.detect_triangle_pattern()
         
-        return TechnicalAnalysisResult(
+        return TechnicalAnalysisResult.model_construct(
             Ressistance_levels=res_json,
             Support_levels=sup_json,
             trend=trend_data,
-            trend_duration=trend_duration[0],
+            trend_duration=int(trend_duration[0]),
             triangle_pattern=triangle_data
         )
 
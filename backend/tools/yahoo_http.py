@@ -0,0 +1,134 @@
+import asyncio
+import httpx
+import pandas as pd
+from cachetools import TTLCache
+
+BASE_URL = "https://query2.finance.yahoo.com"
+HEADERS = {"User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"}
+
+# One pooled HTTP/2 client is shared by every tool, so the TLS handshake is paid once and requests multiplex
+http_client = httpx.AsyncClient(http2=True, timeout=10.0, headers=HEADERS)
+
+# Same 5 minute freshness as tools/yf_cache.py
+QUOTE_SUMMARY_CACHE = TTLCache(maxsize=256, ttl=300)
+CHART_CACHE = TTLCache(maxsize=256, ttl=300)
+
+_crumb = None
+_crumb_lock = asyncio.Lock()
+
+
+async def _get_crumb(refresh: bool = False) -> str:
+    """Fetch (once) the session cookie + crumb that Yahoo requires on quoteSummary requests"""
+    global _crumb
+    async with _crumb_lock:
+        if _crumb is None or refresh:
+            # fc.yahoo.com answers 404 but sets the session cookie on the shared client
+            await http_client.get("https://fc.yahoo.com", follow_redirects=True)
+            resp = await http_client.get(f"{BASE_URL}/v1/test/getcrumb")
+            resp.raise_for_status()
+            _crumb = resp.text
+    return _crumb
+
+
+def _raw_values(module: dict) -> dict:
+    """Flatten Yahoo's {"raw": 1.2, "fmt": "1.20"} values to their raw number"""
+    return {key: value.get("raw") if isinstance(value, dict) else value for key, value in module.items()}
+
+
+async def get_quote_summary_modules(ticker_symbol: str, modules: str) -> dict:
+    """
+    Fetch the given comma-separated quoteSummary modules for a symbol in one request and return them
+    unflattened, keyed by module name (a missing module maps to {}). Values keep Yahoo's {"raw", "fmt"} form.
+    The returned dict is shared between callers and must not be mutated.
+    """
+    key = (ticker_symbol, modules)
+    cached_modules = QUOTE_SUMMARY_CACHE.get(key)
+    if cached_modules is not None:
+        return cached_modules
+
+    url = f"{BASE_URL}/v10/finance/quoteSummary/{ticker_symbol}"
+    for refresh in (False, True):
+        crumb = await _get_crumb(refresh=refresh)
+        resp = await http_client.get(url, params={"modules": modules, "crumb": crumb})
+        # 401 means the crumb expired: refresh it once and retry
+        if resp.status_code != 401:
+            break
+    resp.raise_for_status()
+
+    result = resp.json()["quoteSummary"]["result"]
+    if not result:
+        raise ValueError(f"No quote summary data for {ticker_symbol!r}")
+
+    summary_modules = {module_name: result[0].get(module_name) or {} for module_name in modules.split(",")}
+    QUOTE_SUMMARY_CACHE[key] = summary_modules
+    return summary_modules
+
+
+def flatten_modules(summary_modules: dict, module_names) -> dict:
+    """
+    Merge the named modules into one flat dict of raw values. Field names match `yf.Ticker(...).info`
+    (e.g. "trailingPE", "returnOnEquity"); a field present in several modules takes the last module's value.
+    """
+    flat = {}
+    for module_name in module_names:
+        flat.update(_raw_values(summary_modules.get(module_name) or {}))
+    return flat
+
+
+async def get_quote_summary(ticker_symbol: str, modules: str) -> dict:
+    """
+    Fetch the given comma-separated quoteSummary modules for a symbol and merge them into one flat dict
+    (see flatten_modules).
+    """
+    summary_modules = await get_quote_summary_modules(ticker_symbol, modules)
+    return flatten_modules(summary_modules, modules.split(","))
+
+
+async def get_chart(ticker_symbol: str, period: str = '1mo', interval: str = '1d') -> pd.DataFrame:
+    """
+    Fetch OHLCV history from the chart endpoint as a DataFrame shaped like `yf.Ticker(...).history()`:
+    DatetimeIndex named 'Date' in the exchange timezone, columns Open/High/Low/Close/Volume.
+    Like history()'s default auto_adjust=True, Open/High/Low/Close are scaled by adjclose / close
+    (split- and dividend-adjusted), and daily and longer bars are stamped at midnight instead of the market open.
+    The returned DataFrame is shared between callers and must not be mutated.
+    """
+    key = (ticker_symbol, period, interval)
+    cached_history = CHART_CACHE.get(key)
+    if cached_history is not None:
+        return cached_history
+
+    resp = await http_client.get(
+        f"{BASE_URL}/v8/finance/chart/{ticker_symbol}",
+        params={"range": period, "interval": interval},
+    )
+    resp.raise_for_status()
+
+    result = resp.json()["chart"]["result"]
+    if not result:
+        raise ValueError(f"No price history for {ticker_symbol!r}")
+
+    chart = result[0]
+    timestamps = chart.get("timestamp") or []
+    indicators = chart["indicators"] if timestamps else {}
+    quote = indicators["quote"][0] if timestamps else {}
+    index = pd.to_datetime(timestamps, unit="s", utc=True).tz_convert(
+        chart["meta"].get("exchangeTimezoneName", "UTC")
+    )
+    if interval.endswith(("d", "wk", "mo")):
+        index = index.normalize()
+    history = pd.DataFrame(
+        {column: quote.get(column.lower(), []) for column in ("Open", "High", "Low", "Close", "Volume")},
+        index=index.rename("Date"),
+        dtype="float64",
+    )
+    # Intraday charts carry no adjclose; their prices stay as traded, as in yfinance
+    adjclose = (indicators.get("adjclose") or [{}])[0].get("adjclose")
+    if adjclose:
+        adjusted_close = pd.Series(adjclose, index=history.index, dtype="float64")
+        ratio = adjusted_close / history["Close"]
+        history[["Open", "High", "Low"]] = history[["Open", "High", "Low"]].mul(ratio, axis=0)
+        history["Close"] = adjusted_close
+    history = history.dropna(subset=["Close"])
+
+    CHART_CACHE[key] = history
+    return history
@@ -0,0 +1,37 @@
+import threading
+import pandas as pd
+import yfinance as yf
+from cachetools import TTLCache, cached
+
+# Yahoo round-trips dominate tool latency, so repeated lookups within a session reuse the payload
+INFO_CACHE = TTLCache(maxsize=256, ttl=300)
+HISTORY_CACHE = TTLCache(maxsize=256, ttl=300)
+NEWS_CACHE = TTLCache(maxsize=256, ttl=300)
+
+
+@cached(cache=INFO_CACHE, lock=threading.Lock())
+def get_info(ticker_symbol: str) -> dict:
+    """
+    Return `yf.Ticker(ticker_symbol).info`, cached for 5 minutes per symbol.
+    The returned dict is shared between callers and must not be mutated.
+    """
+    return yf.Ticker(ticker_symbol).info
+
+
+@cached(cache=HISTORY_CACHE, lock=threading.Lock())
+def get_history(ticker_symbol: str, period: str = "1y") -> pd.DataFrame:
+    """
+    Return `yf.Ticker(ticker_symbol).history(period=period)`, cached for 5 minutes per (symbol, period).
+    The technical-analysis and indicator tools both read the same 1y history, so one tool chain downloads it once.
+    The returned DataFrame is shared between callers and must not be mutated.
+    """
+    return yf.Ticker(ticker_symbol).history(period=period)
+
+
+@cached(cache=NEWS_CACHE, lock=threading.Lock())
+def get_news_items(ticker_symbol: str, count: int = 20) -> list:
+    """
+    Return `yf.Ticker(ticker_symbol).get_news(count=count)`, cached for 5 minutes per (symbol, count).
+    The returned list is shared between callers and must not be mutated.
+    """
+    return yf.Ticker(ticker_symbol).get_news(count=count)